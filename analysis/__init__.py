@@ -0,0 +1,2 @@
+# Shared helpers for the analysis scripts. Each script lives in its own directory and is run from there, so
+# process.py puts the repo root on sys.path before importing from here.
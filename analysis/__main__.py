@@ -0,0 +1,215 @@
+"""Command line entry point for the analyses that have been moved into the package:
+
+    python -m analysis team-ovr --sport hockey
+    python -m analysis team-ovr --sport football --summary --exp --plot
+    python -m analysis pot-estimator --sport baseball --data data.csv
+    python -m analysis pot-estimator --sport hockey --max-age 24 26 28 30
+    python -m analysis player-ovr --sport basketball --min-minutes 500 820 1200
+
+Like the process.py scripts, it works on the data files in the current directory. Only the coefficients are printed
+by default, and the slow imports (pandas, sklearn, scipy.stats, matplotlib) only happen for the options that need
+them, so a plain run starts about as fast as numpy does. Plots go through analysis.report, so --plot shows windows
+unless ANALYSIS_REPORT or --report says where to write them.
+
+Giving several values for a cutoff (--max-age, --min-minutes) sweeps it: the data is loaded once, each cutoff is a
+mask over the same arrays, the fits run in worker processes, and one table with a row per cutoff is printed."""
+
+import argparse
+import glob
+
+import numpy as np
+
+# team-ovr-hockey divides mov by 10 because of quarter length
+MOV_SCALE = {'hockey': 10}
+
+# Same ratings as player-ovr-basketball and player-ovr-hockey, where FT.1 is the FT rating (the first FT is the stat)
+PLAYER_OVR_RATINGS = {
+    'basketball': ['Hgt', 'Str', 'Spd', 'Jmp', 'End', 'Ins', 'Dnk', 'FT.1', '3Pt', 'oIQ', 'dIQ', 'Drb', 'Pss', '2Pt', 'Reb'],
+    'hockey': ['Hgt', 'Str', 'Spd', 'End', 'Pss', 'Wst', 'Sst', 'Stk', 'oIQ', 'Chk', 'Blk', 'Fcf', 'dIQ', 'Glk'],
+}
+PLAYER_OVR_MINUTES = {'basketball': 'MP', 'hockey': 'TOI'}
+
+POT_POSITIONS = {
+    'baseball': ['SP', 'RP', 'C', '1B', '2B', '3B', 'SS', 'LF', 'CF', 'RF', 'DH'],
+    'hockey': ['C', 'W', 'D', 'G'],
+}
+
+
+def _print_coef(intercept, coef, names):
+    width = max(len(name) for name in names + ['Intercept'])
+    print('{:<{}} {:>10.4f}'.format('Intercept', width, intercept))
+    for name, value in zip(names, coef):
+        print('{:<{}} {:>10.4f}'.format(name, width, value))
+
+
+def team_ovr(args):
+    from .suffstats import SufficientStats
+    from .team_ovr import DEPTH, FIT_COLS, get_cols, get_slot_names, get_team_ovr_stats
+
+    depth = DEPTH[args.sport]
+    fit_cols = FIT_COLS[args.sport]
+    files = sorted(set(file for pattern in args.files for file in glob.glob(pattern)))
+    if not files:
+        raise SystemExit('No files match {}'.format(' '.join(args.files)))
+
+    scale = MOV_SCALE.get(args.sport, 1)
+
+    def get_stats(x_cols):
+        stats = get_team_ovr_stats(files, depth, x_cols)
+        return SufficientStats(stats.xtx, stats.xty / scale, stats.yty / scale ** 2, stats.n)
+
+    stats = get_stats(fit_cols)
+
+    if args.summary:
+        fit = stats.fit(names=fit_cols)
+        print(fit.summary())
+        intercept, coef = fit.intercept, fit.coef
+    else:
+        intercept, coef = stats.solve()
+        _print_coef(intercept, coef, fit_cols)
+        print('r2: ', stats.r2(intercept, coef))
+
+    if args.exp:
+        from .exp_decay import fit_exp_decay
+
+        print()
+        print('exp fit:')
+        # The decay curves cover every slot, even ones left out of fit_cols
+        slot_cols = get_slot_names(depth)
+        print(fit_exp_decay(stats if slot_cols == fit_cols else get_stats(slot_cols), depth).summary())
+
+    if args.intervals or args.plot:
+        cols = get_cols(files, depth)
+        cols['mov'] = cols['mov'] / scale
+
+    if args.intervals:
+        from .regression import print_coef_intervals
+
+        print()
+        print_coef_intervals(cols, fit_cols, 'mov')
+
+    if args.plot:
+        from .report import Report, density
+
+        predicted = np.column_stack([cols[col] for col in fit_cols]) @ coef + intercept
+        report = Report('team-ovr-' + args.sport, out_dir=args.report)
+        report.add('Team ovr', density(cols['mov'], predicted, bins=20, xlabel='Actual MOV', ylabel='Predicted MOV'))
+        report.finish()
+
+
+def pot_estimator(args):
+    from .csv_table import RATING, read_csv_table
+    from .regression import fit_groups
+
+    # Rows past the oldest cutoff are never needed, so they're dropped while reading
+    where = 'Age <= {}'.format(max(args.max_age))
+
+    if args.sport == 'baseball':
+        positions = POT_POSITIONS[args.sport]
+        columns = {'Age': RATING}
+        for pos in positions:
+            columns['Ovr' + pos] = RATING
+            columns['Pot' + pos] = 'float64'
+        dataset = read_csv_table(args.data, columns, where=where)
+        age = np.tile(dataset['Age'].values, len(positions))
+        ovr = dataset[['Ovr' + pos for pos in positions]].values.T.ravel()
+        pot = dataset[['Pot' + pos for pos in positions]].values.T.ravel()
+        group = np.repeat(np.arange(len(positions)), len(dataset))
+    elif args.sport == 'hockey':
+        import pandas as pd
+
+        positions = POT_POSITIONS[args.sport]
+        dataset = read_csv_table(args.data, {'Age': RATING, 'Ovr': RATING, 'Pos': str, 'Pot': 'float64'}, where=where)
+        age = dataset['Age'].values
+        ovr = dataset['Ovr'].values
+        pot = dataset['Pot'].values
+        group = pd.Categorical(dataset['Pos'], categories=positions).codes
+    else:
+        # Basketball is one regression for everyone, without the interaction term
+        positions = ['Pot']
+        dataset = read_csv_table(args.data, {'Age': RATING, 'Ovr': RATING, 'Pot': 'float64'}, where=where)
+        age = dataset['Age'].values
+        ovr = dataset['Ovr'].values
+        pot = dataset['Pot'].values
+        group = np.zeros(len(dataset), dtype=int)
+
+    if args.sport == 'basketball':
+        x_cols = ['Age', 'Ovr']
+        X = np.column_stack([age, ovr]).astype(np.float64)
+    else:
+        x_cols = ['Age', 'Ovr', 'AgeOvr']
+        X = np.column_stack([age, ovr, age * ovr]).astype(np.float64)
+
+    if len(args.max_age) > 1:
+        from .sweep import sweep
+
+        columns = dict(zip(x_cols, X.T), Pot=pot)
+        print(sweep(columns, x_cols, 'Pot', 'Age <= max_age', {'max_age': args.max_age}, group=group, labels=positions).to_string(index=False))
+        return
+
+    table = fit_groups(X, pot, group, positions, x_cols)
+
+    if args.plot:
+        from .report import Report, density
+
+        keep = group >= 0
+        pot, group, X = pot[keep], group[keep], X[keep]
+        pot_pred = np.einsum('ij,ij->i', X, table[x_cols].values[group]) + table['Intercept'].values[group]
+
+        report = Report('pot-estimator-' + args.sport, out_dir=args.report)
+        report.add('Pot', density(pot, pot_pred, bins=20, range=[[0, 100], [0, 100]], xlabel='Pot', ylabel='Pot_pred', lines=[([0, 100], [0, 100])]))
+        report.finish()
+
+
+def player_ovr(args):
+    from .csv_table import RATING, read_csv_table
+    from .sweep import sweep
+
+    minutes = PLAYER_OVR_MINUTES[args.sport]
+    ratings = PLAYER_OVR_RATINGS[args.sport]
+
+    columns = {minutes: 'float64', 'G': RATING, '+/-': 'float64'}
+    columns.update((rating, RATING) for rating in ratings)
+    # Rows under the lowest cutoff are never needed, so they're dropped while reading
+    dataset = read_csv_table(args.data, columns, where='{} * G > {}'.format(minutes, min(args.min_minutes)))
+    dataset['pmPerMin'] = dataset['+/-'] / dataset[minutes]
+
+    where = '{} * G > min_minutes'.format(minutes)
+    print(sweep(dataset, ratings, 'pmPerMin', where, {'min_minutes': args.min_minutes}).to_string(index=False))
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m analysis', description='Run an analysis on the data files in the current directory')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    plot_parser = argparse.ArgumentParser(add_help=False)
+    plot_parser.add_argument('--plot', action='store_true', help='also make the plots (imports matplotlib)')
+    plot_parser.add_argument('--report', metavar='DIR', help='write the plots here instead of showing them, like ANALYSIS_REPORT')
+
+    parser_team_ovr = subparsers.add_parser('team-ovr', parents=[plot_parser], help='regress team mov on the ovrs of each depth chart slot')
+    parser_team_ovr.add_argument('--sport', choices=['basketball', 'football', 'hockey'], required=True)
+    parser_team_ovr.add_argument('--files', nargs='+', default=['data*.json'], help='league exports, as globs (default: data*.json)')
+    parser_team_ovr.add_argument('--summary', action='store_true', help='print a full coefficient table with standard errors and p-values (imports scipy.stats)')
+    parser_team_ovr.add_argument('--exp', action='store_true', help='also fit an exponential decay over each position\'s slots (imports scipy.optimize)')
+    parser_team_ovr.add_argument('--intervals', action='store_true', help='also print K-fold and bootstrap coefficient intervals (imports pandas and sklearn)')
+    parser_team_ovr.set_defaults(func=team_ovr)
+
+    parser_pot = subparsers.add_parser('pot-estimator', parents=[plot_parser], help='regress pot on age and ovr, by position')
+    parser_pot.add_argument('--sport', choices=['baseball', 'basketball', 'hockey'], required=True)
+    parser_pot.add_argument('--data', default='data.csv')
+    parser_pot.add_argument('--max-age', type=int, nargs='+', default=[28], help='several values fit each one and print a table of all of them')
+    parser_pot.set_defaults(func=pot_estimator)
+
+    parser_player_ovr = subparsers.add_parser('player-ovr', help='regress +/- per minute on ratings, for each minimum total minutes')
+    parser_player_ovr.add_argument('--sport', choices=['basketball', 'hockey'], required=True)
+    parser_player_ovr.add_argument('--data', default='data.csv')
+    parser_player_ovr.add_argument('--min-minutes', type=float, nargs='+', default=[820], help='only fit players with more total minutes than this (default: 820)')
+    parser_player_ovr.set_defaults(func=player_ovr)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
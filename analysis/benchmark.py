@@ -0,0 +1,105 @@
+"""Time the analysis scripts on synthetic league exports, to catch performance regressions.
+
+Run from the repo root, like:
+
+    python -m analysis.benchmark --seasons 20 --out benchmark.json
+
+Each script is run as is, from a temporary directory holding synthetic exports under the file names it reads, with
+instrumentation on like python -m analysis.instrument. So what gets timed is exactly what the script does, stage by
+stage (the low-ovr pipeline stages, load_tables, report.render, LinearRegression.fit, ...), and never drifts from
+it. Every script runs twice: cold, with nothing cached, then warm, with whatever the cold run cached on disk. Work
+done in worker processes only shows up as its map_files stage, unless ANALYSIS_PROCESSES=1.
+
+low-ovr-good-team-football only refits the ratings significant at p < 0.1, so with much less than the default
+seasons and games per season it can end up with none and fail, same as it would on a tiny real league.
+
+Results are saved as JSON, one entry per script per run per stage, so runs can be diffed against each other. Every
+script that reads league exports is covered. The pot-estimator-* and player-ovr-* scripts read a data.csv instead,
+which the synthetic exports don't have, so they aren't."""
+
+import argparse
+import json
+import os
+import platform
+import runpy
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+import numpy as np
+
+from . import instrument
+from .synthetic import write_export
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# The exports each script reads, as (file name, sport). base_ur.json is the league low-ovr-good-team-football adds
+# its two teams to, so any football export will do.
+SCRIPT_FILES = {
+    'team-ovr-basketball': [('data-playoffs.json', 'basketball')],
+    'team-ovr-football': [('data0.json', 'football'), ('data1.json', 'football')],
+    'team-ovr-hockey': [('data0.json', 'hockey'), ('data1.json', 'hockey')],
+    'low-ovr-good-team-football': [('FBGM_League_0.json', 'football'), ('FBGM_League_1.json', 'football'), ('base_ur.json', 'football')],
+    'player-value-vs-contract-amount': [('basketball.json', 'basketball'), ('football.json', 'football')],
+}
+
+
+def run_script(script, data_dir):
+    """Run a script from data_dir with its output hidden, and return the instrumentation summary for just this run."""
+    start = len(instrument.get_records())
+    cwd = os.getcwd()
+    os.chdir(data_dir)
+    try:
+        with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+            with instrument.stage('total'):
+                runpy.run_path(os.path.join(SCRIPTS_DIR, script, 'process.py'), run_name='__main__')
+    finally:
+        os.chdir(cwd)
+    return instrument.get_summary(instrument.get_records()[start:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the analysis scripts on synthetic league exports')
+    parser.add_argument('--seasons', type=int, default=10)
+    parser.add_argument('--teams', type=int, default=30)
+    parser.add_argument('--players-per-team', type=int, default=15)
+    parser.add_argument('--games-per-season', type=int, default=100, help='only used for football, which needs box scores')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scripts', nargs='+', choices=list(SCRIPT_FILES), default=list(SCRIPT_FILES))
+    parser.add_argument('--out', default='benchmark.json')
+    args = parser.parse_args()
+
+    instrument._patch_third_party()
+    instrument.enable()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Figures get rendered to files, not shown
+        os.environ['ANALYSIS_REPORT'] = os.path.join(tmp_dir, 'report')
+
+        for script in args.scripts:
+            data_dir = os.path.join(tmp_dir, script)
+            os.makedirs(data_dir)
+            for i, (name, sport) in enumerate(SCRIPT_FILES[script]):
+                games_per_season = args.games_per_season if sport == 'football' else 0
+                write_export(os.path.join(data_dir, name), sport, num_seasons=args.seasons, num_teams=args.teams, players_per_team=args.players_per_team, games_per_season=games_per_season, seed=args.seed + i)
+
+            for run in ['cold', 'warm']:
+                for r in run_script(script, data_dir):
+                    results.append({'script': script, 'run': run, 'stage': r['stage'], 'calls': r['calls'], 'seconds': r['wall'], 'cpu': r['cpu'], 'peak_rss_mb': r['peak_rss_mb']})
+                    print('{:<32} {:<5} {:<48} {:8.3f}s'.format(script, run, r['stage'], r['wall']))
+
+    output = {
+        'params': vars(args),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(output, f, indent=2)
+    print('Saved', args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+import json
+import os
+
+import numpy as np
+
+
+def _schema_path(path):
+    return path + '.json'
+
+
+def create_design_matrix(path, num_rows, columns, dtype=np.float32):
+    """A new zero filled (num_rows, len(columns)) matrix backed by a file on disk rather than RAM, with the column
+    names saved in a JSON sidecar next to it so open_design_matrix can read it back later.
+
+    Rows can be filled a block at a time as they're computed, and only the pages being touched need to be in memory."""
+    dtype = np.dtype(dtype)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    schema = {'columns': list(columns), 'num_rows': num_rows, 'dtype': dtype.name}
+    tmp_path = _schema_path(path) + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(schema, f)
+    os.replace(tmp_path, _schema_path(path))
+
+    shape = (num_rows, len(schema['columns']))
+    if num_rows == 0:
+        # mmap can't map an empty file
+        open(path, 'wb').close()
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='w+', shape=shape)
+
+
+def open_design_matrix(path, mode='r'):
+    """(matrix, columns) for a design matrix saved by create_design_matrix."""
+    with open(_schema_path(path)) as f:
+        schema = json.load(f)
+
+    shape = (schema['num_rows'], len(schema['columns']))
+    if schema['num_rows'] == 0:
+        return np.zeros(shape, dtype=schema['dtype']), schema['columns']
+    return np.memmap(path, dtype=schema['dtype'], mode=mode, shape=shape), schema['columns']
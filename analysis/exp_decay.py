@@ -0,0 +1,130 @@
+import numpy as np
+
+from .instrument import instrumented
+from .team_ovr import get_slot_names
+
+# Range each rate is searched over. Depth charts go from best to worst, so a weight that grows down the chart makes
+# no sense, and anything below -5 already puts almost all of a position's weight on its first slot.
+RATE_BOUNDS = (-5, 0)
+
+
+class ExpDecayFit:
+    """mov = intercept + the sum over positions of scale * exp(rate * i) * (ovr of the player in slot i)
+
+    Each position in the depth spec gets its own scale and rate, so basketball (one group of 10 slots) is the
+    familiar a e^{b x} + c form and football/hockey get one decay curve per position. A position with a single slot
+    (like QB or K) only has a scale, and its rate is always 0."""
+
+    def __init__(self, depth, intercept, scales, rates, r2):
+        self.depth = dict(depth)
+        self.intercept = float(intercept)
+        self.scales = np.asarray(scales, dtype=np.float64)
+        self.rates = np.asarray(rates, dtype=np.float64)
+        self.r2 = r2
+
+    @property
+    def names(self):
+        return get_slot_names(self.depth)
+
+    @property
+    def coef(self):
+        """The weight on each slot, in get_slot_names(depth) order."""
+        return _get_weights(self.depth, self.rates) @ self.scales
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def summary(self):
+        lines = []
+        for (pos, num_players), scale, rate in zip(self.depth.items(), self.scales, self.rates):
+            prefix = '' if pos is None else pos + ': '
+            if num_players > 1:
+                lines.append('{}{:.4f} e^{{ {:.4f} x }}'.format(prefix, scale, rate))
+            else:
+                lines.append('{}{:.4f}'.format(prefix, scale))
+        lines.append('intercept: {:.2f}'.format(self.intercept))
+        lines.append('r2: {}'.format(self.r2))
+        return '\n'.join(lines)
+
+
+def _get_weights(depth, rates, derivative=False):
+    """(slots, positions) matrix with exp(rate * i) for each position's i-th slot, or its derivative by rate."""
+    weights = np.zeros((sum(depth.values()), len(depth)))
+    start = 0
+    for j, (num_players, rate) in enumerate(zip(depth.values(), rates)):
+        i = np.arange(num_players)
+        weights[start:start + num_players, j] = i * np.exp(rate * i) if derivative else np.exp(rate * i)
+        start += num_players
+    return weights
+
+
+def _solve_scales(rates, depth, stats):
+    """Design weights (const plus one column per position), and the least squares intercept and scales for them."""
+    W = np.zeros((stats.xtx.shape[0], len(depth) + 1))
+    W[0, 0] = 1
+    W[1:, 1:] = _get_weights(depth, rates)
+
+    gram = W.T @ stats.xtx @ W
+    Xy = W.T @ stats.xty
+    c = np.linalg.lstsq(gram, Xy, rcond=None)[0]
+    return W, gram, Xy, c
+
+
+def _projected_sse(rates, depth, stats):
+    """SSE with the scales and intercept solved exactly for these rates (variable projection), plus its gradient.
+
+    Everything is in terms of the sufficient statistics, so each evaluation is a few small matrix products no
+    matter how many team seasons there are. Because the residual is orthogonal to the design at the optimal scales,
+    the gradient only needs the derivative of the design, not of the scales."""
+    W, gram, Xy, c = _solve_scales(rates, depth, stats)
+    sse = stats.yty - 2 * c @ Xy + c @ gram @ c
+
+    # d sse / d rate_j = 2 scale_j dw_j' (xtx W c - xty), where dw_j is only nonzero on position j's slots
+    residual_grad = (stats.xtx @ (W @ c) - stats.xty)[1:]
+    grad = 2 * c[1:] * (_get_weights(depth, rates, derivative=True).T @ residual_grad)
+
+    return sse, grad
+
+
+def _get_initial_rates(depth, coef):
+    """Slope of log(coef) against slot number for each position, like fitting a line to the OLS coefficients, within
+    RATE_BOUNDS."""
+    rates = np.zeros(len(depth))
+    start = 0
+    for j, num_players in enumerate(depth.values()):
+        block = coef[start:start + num_players]
+        if num_players > 1 and np.all(block > 0):
+            rates[j] = np.polyfit(np.arange(num_players), np.log(block), 1)[0]
+        start += num_players
+    return np.clip(rates, *RATE_BOUNDS)
+
+
+@instrumented()
+def fit_exp_decay(stats, depth, rates=None):
+    """Least squares fit of the ExpDecayFit model, from SufficientStats of mov on the slots in get_slot_names(depth)
+    order.
+
+    Only the rates are searched numerically (L-BFGS-B with an analytic gradient, within RATE_BOUNDS), the scales and
+    intercept are solved in closed form for each trial. Positions with a single slot keep a rate of 0, since
+    exp(rate * 0) is 1 whatever the rate. rates is the starting point, by default from the OLS coefficients."""
+    import scipy.optimize as opt
+
+    if rates is None:
+        rates = _get_initial_rates(depth, stats.solve()[1])
+    rates = np.array(rates, dtype=np.float64)
+
+    free = np.array(list(depth.values())) > 1
+    rates[~free] = 0
+
+    def sse(free_rates):
+        rates[free] = free_rates
+        value, grad = _projected_sse(rates, depth, stats)
+        return value, grad[free]
+
+    if np.any(free):
+        res = opt.minimize(sse, rates[free], jac=True, method='L-BFGS-B', bounds=[RATE_BOUNDS] * int(free.sum()))
+        rates[free] = res.x
+
+    W, _, _, c = _solve_scales(rates, depth, stats)
+    coef = W[1:, 1:] @ c[1:]
+    return ExpDecayFit(depth, c[0], c[1:], rates, stats.r2(c[0], coef))
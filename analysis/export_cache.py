@@ -0,0 +1,185 @@
+import hashlib
+import os
+
+import numpy as np
+
+from .instrument import instrumented
+from .league_export import iter_export
+
+# Bump this whenever the table layout changes, so old cache files are ignored
+CACHE_VERSION = 1
+
+# Box scores have dozens of stats per player per game, and none of the scripts need more than these
+BOX_SCORE_COLUMNS = ['pid', 'pos', 'min']
+
+TABLES = ['player_ratings', 'player_stats', 'team_stats', 'games', 'game_players']
+
+
+_hashes = {}
+
+
+def hash_file(path):
+    """sha1 of a file's contents, remembered for the life of the process unless the file's size or mtime changes."""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if memo_key not in _hashes:
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        _hashes[memo_key] = h.hexdigest()
+    return _hashes[memo_key]
+
+
+class _TableBuilder:
+    """Collect rows of scalar values into columns. Keys that only show up in some rows get filled with None."""
+
+    def __init__(self):
+        self.columns = {}
+        self.num_rows = 0
+
+    def add(self, row):
+        for key, value in row.items():
+            if isinstance(value, (list, dict)):
+                continue
+            if key not in self.columns:
+                self.columns[key] = [None] * self.num_rows
+            self.columns[key].append(value)
+        self.num_rows += 1
+        for values in self.columns.values():
+            if len(values) < self.num_rows:
+                values.append(None)
+
+    def finalize(self):
+        table = {}
+        for key, values in self.columns.items():
+            types = set(type(v) for v in values)
+            if types == {int}:
+                table[key] = np.array(values, dtype=np.int64)
+            elif types <= {int, float, type(None)}:
+                table[key] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            elif types <= {str, type(None)}:
+                table[key] = np.array(['' if v is None else v for v in values], dtype=str)
+            elif types <= {bool, type(None)}:
+                table[key] = np.array([bool(v) for v in values], dtype=bool)
+            # Anything else (mixed types) isn't used by the scripts, so it's dropped
+        return table
+
+
+def _build_tables(path):
+    player_ratings = _TableBuilder()
+    player_stats = _TableBuilder()
+    team_stats = _TableBuilder()
+    games = _TableBuilder()
+    game_players = _TableBuilder()
+
+    for key, record in iter_export(path, ['players', 'teams', 'games']):
+        if key == 'players':
+            pid = record['pid']
+            for r in record.get('ratings', []):
+                player_ratings.add(dict(r, pid=pid))
+            for r in record.get('stats', []):
+                player_stats.add(dict(r, pid=pid))
+        elif key == 'teams':
+            tid = record['tid']
+            for ts in record.get('stats', []):
+                team_stats.add(dict(ts, tid=tid))
+        elif key == 'games':
+            game = games.num_rows
+            teams = record['teams']
+            games.add({
+                'gid': record['gid'],
+                'season': record['season'],
+                'tid0': teams[0]['tid'],
+                'tid1': teams[1]['tid'],
+                'won_tid': record['won']['tid'],
+                'won_pts': record['won']['pts'],
+                'lost_tid': record['lost']['tid'],
+                'lost_pts': record['lost']['pts'],
+            })
+            for i in range(2):
+                for p in teams[i]['players']:
+                    row = {k: p[k] for k in BOX_SCORE_COLUMNS if k in p}
+                    row['game'] = game
+                    row['team'] = i
+                    row['tid'] = teams[i]['tid']
+                    game_players.add(row)
+
+    return {
+        'player_ratings': player_ratings.finalize(),
+        'player_stats': player_stats.finalize(),
+        'team_stats': team_stats.finalize(),
+        'games': games.finalize(),
+        'game_players': game_players.finalize(),
+    }
+
+
+@instrumented()
+def load_tables(path, cache_dir=None):
+    """Columnar tables for a league export, parsed once and then cached on disk keyed by the file's content hash.
+
+    Returns a dict of table name (player_ratings, player_stats, team_stats, games, game_players) to a dict of
+    column name to numpy array. Rows are in the same order they appear in the export. game_players has one row
+    per player per team per game, with game being the row index into games and team being 0 (home) or 1."""
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), '.cache')
+    cache_file = os.path.join(cache_dir, '{}-{}-v{}.npz'.format(os.path.basename(path), hash_file(path), CACHE_VERSION))
+
+    if os.path.exists(cache_file):
+        tables = {table: {} for table in TABLES}
+        with np.load(cache_file) as npz:
+            for name in npz.files:
+                table, column = name.split('/', 1)
+                tables.setdefault(table, {})[column] = npz[name]
+        return tables
+
+    tables = _build_tables(path)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_file = cache_file + '.tmp.npz'
+    np.savez(tmp_file, **{table + '/' + column: values for table, columns in tables.items() for column, values in columns.items()})
+    os.replace(tmp_file, cache_file)
+
+    return tables
+
+
+def iter_rows(table):
+    """Yield each row of a table as a dict, for code that still wants to loop like it did over the raw JSON."""
+    columns = list(table.keys())
+    for values in zip(*(table[column].tolist() for column in columns)):
+        yield dict(zip(columns, values))
+
+
+def find_rows(table_keys, query_keys, keep='last'):
+    """Row index into a table for each query, matching on several integer key columns at once, or -1 if none match.
+
+    table_keys and query_keys are lists of arrays, like [pid, season]. If several rows share a key, keep says
+    whether the first or last one wins."""
+    table_combined = np.zeros(len(table_keys[0]), dtype=np.int64)
+    query_combined = np.zeros(len(query_keys[0]), dtype=np.int64)
+    for table_col, query_col in zip(table_keys, query_keys):
+        both = np.concatenate([table_col, query_col])
+        if len(both) == 0:
+            continue
+        low = both.min()
+        span = both.max() - low + 1
+        table_combined = table_combined * span + (table_col - low)
+        query_combined = query_combined * span + (query_col - low)
+
+    if keep == 'last':
+        # Reverse before np.unique so the first occurrence it keeps is really the last row
+        unique_keys, idx = np.unique(table_combined[::-1], return_index=True)
+        rows = len(table_combined) - 1 - idx
+    else:
+        unique_keys, rows = np.unique(table_combined, return_index=True)
+
+    if len(unique_keys) == 0:
+        return np.full(len(query_combined), -1)
+    found = np.searchsorted(unique_keys, query_combined)
+    found[found == len(unique_keys)] = 0
+    return np.where(unique_keys[found] == query_combined, rows[found], -1)
+
+
+def get_ratings_rows(ratings, pids, seasons, keep='last'):
+    """Row index into a player_ratings table for each (pid, season), or -1 if that player has no ratings then."""
+    return find_rows([ratings['pid'], ratings['season']], [pids, seasons], keep)
@@ -0,0 +1,113 @@
+import numpy as np
+
+from .export_cache import get_ratings_rows, load_tables
+from .incremental import get_cached_features
+from .instrument import instrumented
+from .ratings_table import RatingsTable
+
+
+@instrumented()
+def get_position_features(tables, rating_cols, positions):
+    """Minutes-weighted average of each rating at each position, home team minus away team, for every game.
+
+    Returns (X, y), where X has one row per game with columns ordered position by position and then by
+    rating_cols within each position, and y is the home team's margin of victory. A position nobody played at
+    contributes 0, same as the old per-game DataFrame groupby with 1e-9 minute dummy rows."""
+    games = tables['games']
+    box = tables['game_players']
+    ratings = tables['player_ratings']
+    num_games = len(games['season'])
+    num_pos = len(positions)
+
+    y = np.where(games['won_tid'] == games['tid0'], games['won_pts'] - games['lost_pts'], games['lost_pts'] - games['won_pts'])
+
+    mins = box['min'].astype(np.float64)
+    played = mins > 0
+    game = box['game'][played]
+    team = box['team'][played]
+    mins = mins[played]
+
+    positions_sorted = np.argsort(positions)
+    pos_idx = np.searchsorted(np.asarray(positions)[positions_sorted], box['pos'][played])
+    pos_idx[pos_idx == num_pos] = 0
+    if not np.all(np.asarray(positions)[positions_sorted][pos_idx] == box['pos'][played]):
+        raise ValueError('Box score has a position not in positions')
+    pos_idx = positions_sorted[pos_idx]
+
+    rows = get_ratings_rows(ratings, box['pid'][played], games['season'][game])
+    if np.any(rows < 0):
+        raise KeyError('Box score player has no ratings for that season')
+
+    group = (game * 2 + team) * num_pos + pos_idx
+    num_groups = num_games * 2 * num_pos
+
+    minutes = np.bincount(group, weights=mins, minlength=num_groups) + 1e-9
+    X = np.empty((num_groups, len(rating_cols)))
+    for j, col in enumerate(rating_cols):
+        X[:, j] = np.bincount(group, weights=mins * ratings[col][rows], minlength=num_groups) / minutes
+
+    X = X.reshape(num_games, 2, num_pos * len(rating_cols))
+    return X[:, 0] - X[:, 1], y
+
+
+# Bump this whenever get_league_features changes, so cached features from the old version are ignored
+LEAGUE_FEATURES_KEY = 'game_features.get_league_features v2'
+
+
+@instrumented()
+def get_league_features(file):
+    """Everything low-ovr-good-team-football needs from one FBGM export, split out so it can run in a worker process.
+
+    Returns a dict with valid_pos and valid_col for this file, pos_Xs/pos_y/pos_min (ratings in valid_col order, AV
+    per minute and minutes for every player season with AV, as arrays by position) and X/y from
+    get_position_features."""
+    tables = load_tables(file)
+    ratings = RatingsTable.from_tables(tables['player_ratings'])
+
+    valid_pos = ratings.positions
+    valid_col = [k for k in ratings.rating_cols if k not in ['min', 'pos', 'ovr', 'pot', 'injuryIndex']]
+
+    stats = tables['player_stats']
+    played = stats['min'] > 0
+    rows = ratings.find(stats['pid'][played], stats['season'][played])
+    if np.any(rows < 0):
+        raise KeyError('Player stats row has no ratings for that season')
+
+    has_av = stats['av'][played] != 0
+    rows = rows[has_av]
+    mins = stats['min'][played][has_av].astype(np.float64)
+    av_per_min = stats['av'][played][has_av] / mins
+    Xs = ratings.ratings[rows][:, [ratings.rating_cols.index(k) for k in valid_col]]
+    pos = ratings.pos[rows]
+
+    pos_Xs = {}
+    pos_y = {}
+    pos_min = {}
+    for code, name in enumerate(ratings.positions):
+        mask = pos == code
+        if np.any(mask):
+            pos_Xs[name] = Xs[mask]
+            pos_y[name] = av_per_min[mask]
+            pos_min[name] = mins[mask]
+
+    X, y = get_position_features(tables, valid_col, valid_pos)
+
+    return {
+        'valid_pos': valid_pos,
+        'valid_col': valid_col,
+        'pos_Xs': pos_Xs,
+        'pos_y': pos_y,
+        'pos_min': pos_min,
+        'X': X,
+        'y': y,
+    }
+
+
+def get_league_blocks(file, key=LEAGUE_FEATURES_KEY):
+    """get_league_features(file) through get_cached_features, but without X and with its number of rows instead.
+
+    The rest is small enough to keep for every file at once, so X can be read back from the cache one file at a time
+    and written straight into a design matrix, without every file's X being in memory together."""
+    features = dict(get_cached_features(file, get_league_features, key))
+    features['num_rows'] = len(features.pop('X'))
+    return features
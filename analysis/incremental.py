@@ -0,0 +1,63 @@
+import hashlib
+import os
+import pickle
+from functools import partial
+
+import numpy as np
+
+from .export_cache import hash_file
+from .instrument import instrumented
+from .pool import map_files
+from .suffstats import SufficientStats
+
+
+def _cache_path(file, key, suffix):
+    key_hash = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(file)), '.cache')
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, '{}-{}-{}.{}'.format(os.path.basename(file), hash_file(file), key_hash, suffix))
+
+
+@instrumented()
+def get_cached_features(file, extract, key):
+    """extract(file), saved on disk next to the export so it only ever runs once per version of the file.
+
+    key has to change whenever extract's output would, like repr() of its parameters."""
+    path = _cache_path(file, key, 'features.pkl')
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    features = extract(file)
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(features, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+    return features
+
+
+def get_file_stats(file, extract, key, x_cols, y_col):
+    """SufficientStats of y_col on x_cols for one file's features, also cached on disk."""
+    path = _cache_path(file, key + repr((x_cols, y_col)), 'stats.npz')
+    if os.path.exists(path):
+        return SufficientStats.load(path)
+
+    features = get_cached_features(file, extract, key)
+    X = np.column_stack([features[col] for col in x_cols])
+    stats = SufficientStats.from_data(X, features[y_col])
+
+    tmp_path = path + '.tmp.npz'
+    stats.save(tmp_path)
+    os.replace(tmp_path, path)
+
+    return stats
+
+
+@instrumented()
+def fit_files(files, extract, key, x_cols, y_col):
+    """Sum of every file's SufficientStats. Files seen before are just loaded from disk, so adding a new export only
+    costs extracting that one file, and solving is O(features^2) no matter how many rows there are."""
+    all_stats = map_files(partial(get_file_stats, extract=extract, key=key, x_cols=x_cols, y_col=y_col), files)
+    return sum(all_stats[1:], all_stats[0])
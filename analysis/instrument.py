@@ -0,0 +1,267 @@
+"""Opt-in timing and memory instrumentation for the analysis scripts.
+
+Run any script through this, from the repo root, to get wall time, CPU time and peak RSS for each stage:
+
+    python -m analysis.instrument analysis/team-ovr-basketball/process.py
+    python -m analysis.instrument --profile out.pstats --tracemalloc 20 analysis/low-ovr-good-team-football/process.py
+
+The script runs from its own directory, like it normally would. Stages are the helpers in this package (load_tables,
+get_slot_cols, ...) plus the slow third party calls the scripts make directly (json.load, pd.read_csv, model fits,
+plt.show), so the scripts themselves don't need to change. Setting ANALYSIS_INSTRUMENT=1 also turns on stage
+recording when running a script normally, with a summary printed at exit. The summary has one row per stage, with
+how many times it ran, its total wall and CPU time and its highest peak RSS.
+
+Work done in map_files worker processes shows up as one map_files stage. Set ANALYSIS_PROCESSES=1 to see it broken
+down further."""
+
+import argparse
+import atexit
+import functools
+import json
+import os
+import resource
+import runpy
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+_enabled = os.environ.get('ANALYSIS_INSTRUMENT') == '1'
+_records = []
+_stack = []
+
+
+def _read_peak_rss():
+    """Peak RSS in MB since the last _reset_peak_rss, or since the process started if that's not supported."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux but bytes on macOS
+    return maxrss / (1024 * 1024) if sys.platform == 'darwin' else maxrss / 1024
+
+
+def _reset_peak_rss():
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def _read_peak_traced():
+    return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+
+
+def _reset_peaks():
+    """Reset the peaks _read_peak_rss and _read_peak_traced report, where that's supported. tracemalloc.reset_peak
+    is Python 3.9+, so before that the traced peak is just since tracing started."""
+    _reset_peak_rss()
+    if tracemalloc.is_tracing() and hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+
+
+def _fold_peaks(frame, peak_rss_mb, peak_traced_mb):
+    frame['peak_rss_mb'] = max(frame['peak_rss_mb'], peak_rss_mb)
+    if peak_traced_mb is not None:
+        frame['peak_traced_mb'] = max(frame['peak_traced_mb'], peak_traced_mb)
+
+
+@contextmanager
+def stage(name):
+    """Record wall time, CPU time and peak RSS for a block of code, if instrumentation is on."""
+    if not _enabled:
+        yield
+        return
+
+    # Each stage resets the peaks when it starts, so first the peak the enclosing stage reached up to here is folded
+    # into its running max, or an outer stage would only ever report what happened after its last child started
+    if _stack:
+        _fold_peaks(_stack[-1], _read_peak_rss(), _read_peak_traced() if tracemalloc.is_tracing() else None)
+    frame = {'name': name, 'peak_rss_mb': 0, 'peak_traced_mb': 0}
+    _stack.append(frame)
+    _reset_peaks()
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        _fold_peaks(frame, _read_peak_rss(), _read_peak_traced() if tracemalloc.is_tracing() else None)
+        record = {
+            'stage': '/'.join([f['name'] for f in _stack[:-1]] + [name]),
+            'wall': time.perf_counter() - wall_start,
+            'cpu': time.process_time() - cpu_start,
+            'peak_rss_mb': frame['peak_rss_mb'],
+        }
+        if tracemalloc.is_tracing():
+            record['peak_traced_mb'] = frame['peak_traced_mb']
+        _records.append(record)
+
+        _stack.pop()
+        if _stack:
+            _fold_peaks(_stack[-1], record['peak_rss_mb'], record.get('peak_traced_mb'))
+
+
+def instrumented(name=None):
+    """Decorator version of stage, defaulting to the function's name."""
+    def decorator(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with stage(stage_name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def get_records():
+    return list(_records)
+
+
+def get_summary(records=None):
+    """The records (by default every one so far) added up per stage, in the order each stage first finished: calls,
+    total wall and CPU time, and the highest peak memory of any call."""
+    summary = {}
+    for r in _records if records is None else records:
+        if r['stage'] not in summary:
+            summary[r['stage']] = dict(r, calls=0, wall=0, cpu=0)
+        total = summary[r['stage']]
+        total['calls'] += 1
+        total['wall'] += r['wall']
+        total['cpu'] += r['cpu']
+        for key in ['peak_rss_mb', 'peak_traced_mb']:
+            if key in r:
+                total[key] = max(total[key], r[key])
+    return list(summary.values())
+
+
+def print_summary():
+    summary = get_summary()
+    if not summary:
+        return
+    width = max(len(r['stage']) for r in summary)
+    print()
+    print('{:<{}} {:>7} {:>10} {:>10} {:>14}'.format('stage', width, 'calls', 'wall (s)', 'cpu (s)', 'peak RSS (MB)'))
+    for r in summary:
+        print('{:<{}} {:>7d} {:>10.3f} {:>10.3f} {:>14.1f}'.format(r['stage'], width, r['calls'], r['wall'], r['cpu'], r['peak_rss_mb']))
+
+
+# Slow calls the scripts make directly, as (module, attribute path, stage name). Each one gets wrapped in a stage if
+# its module can be imported. Nothing pandas calls internally all the time (like the DataFrame constructor), since
+# that would time pandas' own bookkeeping thousands of times over.
+THIRD_PARTY_STAGES = [
+    ('json', 'load', 'json.load'),
+    ('pandas', 'read_csv', 'pd.read_csv'),
+    ('sklearn.linear_model', 'LinearRegression.fit', 'LinearRegression.fit'),
+    ('sklearn.linear_model', 'ElasticNetCV.fit', 'ElasticNetCV.fit'),
+    ('statsmodels.regression.linear_model', 'OLS.fit', 'OLS.fit'),
+    ('scipy.optimize', 'minimize', 'scipy.optimize.minimize'),
+    ('matplotlib.pyplot', 'show', 'plt.show'),
+]
+
+
+def _patch_third_party():
+    import importlib
+
+    for module_name, attr_path, stage_name in THIRD_PARTY_STAGES:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+
+        owner = module
+        parts = attr_path.split('.')
+        for part in parts[:-1]:
+            owner = getattr(owner, part)
+        setattr(owner, parts[-1], instrumented(stage_name)(getattr(owner, parts[-1])))
+
+
+def run(script, script_args=(), profile_out=None, tracemalloc_top=None, out=None):
+    """Run a process.py script from its own directory with instrumentation on, then print what was recorded."""
+    script = os.path.abspath(script)
+
+    _patch_third_party()
+    enable()
+
+    if tracemalloc_top:
+        tracemalloc.start()
+
+    profiler = None
+    if profile_out:
+        import cProfile
+        profiler = cProfile.Profile()
+
+    sys.argv = [script] + list(script_args)
+    os.chdir(os.path.dirname(script))
+
+    try:
+        with stage('total'):
+            if profiler:
+                profiler.enable()
+            try:
+                runpy.run_path(script, run_name='__main__')
+            finally:
+                if profiler:
+                    profiler.disable()
+    finally:
+        print_summary()
+
+        if profiler:
+            import pstats
+            profiler.dump_stats(profile_out)
+            print()
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+
+        if tracemalloc_top:
+            snapshot = tracemalloc.take_snapshot()
+            print()
+            print('Top {} allocation sites still alive at exit:'.format(tracemalloc_top))
+            for stat in snapshot.statistics('lineno')[:tracemalloc_top]:
+                print(stat)
+
+        if out:
+            with open(out, 'w') as f:
+                json.dump(get_records(), f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run an analysis script with per-stage timing and memory instrumentation')
+    parser.add_argument('--profile', metavar='FILE', help='also save a cProfile dump here, and print the top functions')
+    parser.add_argument('--tracemalloc', metavar='N', type=int, help='also trace Python allocations and print the top N lines')
+    parser.add_argument('--out', metavar='FILE', help='save every stage record (not just the summary) here as JSON')
+    parser.add_argument('script')
+    parser.add_argument('args', nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    # Under python -m this file is __main__, but the rest of the package records into analysis.instrument
+    from . import instrument
+
+    instrument.run(
+        args.script,
+        args.args,
+        profile_out=os.path.abspath(args.profile) if args.profile else None,
+        tracemalloc_top=args.tracemalloc,
+        out=os.path.abspath(args.out) if args.out else None,
+    )
+
+
+if __name__ == '__main__':
+    main()
+elif _enabled:
+    atexit.register(print_summary)
@@ -0,0 +1,114 @@
+import json
+
+CHUNK_SIZE = 1 << 20
+
+_decoder = json.JSONDecoder()
+_whitespace = ' \t\n\r'
+_delimiters = ',]}:' + _whitespace
+
+
+class _Reader:
+    def __init__(self, f):
+        self.f = f
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        if self.eof:
+            return False
+
+        # Drop what has already been consumed, so memory stays bounded by the biggest single record
+        if self.pos > 0:
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+
+        # Read at least as much as is already buffered, so retrying a huge record doesn't go quadratic
+        chunk = self.f.read(max(CHUNK_SIZE, len(self.buf)))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _whitespace:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError('Expected {!r} at offset {} in league export'.format(char, self.pos))
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+
+            # A number cut off by the end of the buffer still parses, so only trust it once the next delimiter is in
+            if not self.eof and (end == len(self.buf) or self.buf[end] not in _delimiters):
+                self.fill()
+                continue
+
+            self.pos = end
+            return obj
+
+
+def iter_export(path, keys=None):
+    """Yield (key, record) pairs from a league export without loading the whole file.
+
+    Top level arrays (players, teams, games, ...) are yielded one element at a time, anything else is yielded as
+    a single value. If keys is given, everything else is skipped over without being kept in memory."""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        reader = _Reader(f)
+        reader.expect('{')
+
+        if reader.peek() == '}':
+            return
+
+        while True:
+            key = reader.value()
+            reader.expect(':')
+            wanted = keys is None or key in keys
+
+            if reader.peek() == '[':
+                reader.pos += 1
+                if reader.peek() == ']':
+                    reader.pos += 1
+                else:
+                    while True:
+                        record = reader.value()
+                        if wanted:
+                            yield key, record
+                        if reader.peek() == ',':
+                            reader.pos += 1
+                        else:
+                            reader.expect(']')
+                            break
+            else:
+                record = reader.value()
+                if wanted:
+                    yield key, record
+
+            if reader.peek() == ',':
+                reader.pos += 1
+            else:
+                reader.expect('}')
+                break
+
+
+def iter_records(path, key):
+    """Yield each element of one top level array in a league export, like data[key] without the json.load."""
+    for _, record in iter_export(path, [key]):
+        yield record
+
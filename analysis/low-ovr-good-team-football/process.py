@@ -1,340 +1,245 @@
-import pandas as pd  
-import numpy as np  
-import matplotlib.pyplot as plt  
-from sklearn.linear_model import LinearRegression,Ridge,ElasticNet,ElasticNetCV,LassoCV,SGDRegressor,RidgeCV
+import pandas as pd
+import numpy as np
 from collections import defaultdict
+from functools import partial
 import json
-import statsmodels.api as sm
 
-from sklearn.preprocessing import StandardScaler, PolynomialFeatures
 import os, sys
 
 import fnmatch
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from analysis.design_matrix import create_design_matrix, open_design_matrix
+from analysis.elastic_net import fit_elastic_net_cv
+from analysis.game_features import LEAGUE_FEATURES_KEY, get_league_blocks, get_league_features
+from analysis.incremental import get_cached_features
+from analysis.pipeline import Pipeline
+from analysis.pool import map_files
+from analysis.ratings_table import RatingsTable, top_n
+from analysis.report import Report, density, histogram
+from analysis.suffstats import SufficientStats
 
+# Each stage below is cached in .cache by a hash of its code, parameters, input files and upstream stages, so say
+# changing min_ovr_over only reruns select, not the feature extraction or the elastic net fits
+pipeline = Pipeline('low-ovr-good-team-football')
 
-Xso = []
-y = []
+files = sorted([file for file in os.listdir('.') if fnmatch.fnmatch(file, 'FBGM_League*.json')])
 
-pos_Xs = defaultdict(list)
-pos_y = defaultdict(list) 
-pos_min = defaultdict(list) 
-
-for file in sorted(os.listdir('.')):
-    if fnmatch.fnmatch(file, 'FBGM_League*.json'):
-        print(file)
-        data = json.load(open(file,'rt',encoding='utf-8-sig'))
-        player_ratings = {}
-        player_pos = {}
-
-        valid_pos = set()
-        for p in data['players']:
-            for r in p['ratings']:
-                player_ratings[(p['pid'],r['season'])] ={k:v for k,v in r.items() if type(v) == int and k != 'season'}
-                player_pos[(p['pid'],r['season'])] =r['pos']
-
-                valid_pos.add(r['pos'])
-        for p in data['players']:
-            for r in p['stats']:
-                if r['min'] > 0:
-                    pos = player_pos[(p['pid'],r['season'])]
-                    pAV = r['av']
-                    if pAV:
-                        pos_Xs[pos].append(player_ratings[(p['pid'],r['season'])])
-                        pos_y[pos].append(float(pAV)/r['min'])
-                        pos_min[pos].append(r['min'])
-
-        valid_pos = sorted(list(valid_pos))
-        valid_col = [k for k in list(player_ratings.values())[0] if k not in ['min','pos','ovr','pot','injuryIndex']]
-        print(valid_pos)
-
-        for g in data['games']:
-            season = g['season']
-            if g['won']['tid'] == g['teams'][0]['tid']: #home team won
-                s = g['won']['pts'] - g['lost']['pts'] 
-            else:
-                s =  g['lost']['pts'] - g['won']['pts']
-            y.append(s)
-            r2 = []
-            for i in range(2):
-                team_r = []
-                t = g['teams'][i]['players']
-                for p in t:
-                    pos = p['pos']
-                    mp = p['min']
-                    r = {k:mp*v for k,v in player_ratings[(p['pid'],season)].items()}
-                    r['pos'] = pos
-                    r['min'] = mp
-                    if mp > 0:
-                        team_r.append(r)
-                # dummies to make sure we have players at every pos
-                for p in valid_pos:
-                    r = {k:0 for k in r}
-                    r['pos'] = p
-                    r['min'] = 1e-9
-                    team_r.append(r)
-
-                # should be alphabetical
-                res = pd.DataFrame(team_r).groupby('pos').sum()
-                res2 = res.divide(res['min'],'rows')
-                ra = np.array(res2[valid_col])
-                r2.append(ra)
-            Xso.append(np.array(r2[0] - r2[1]).flatten())
-
-
-
-for pos in valid_pos:
-    print(pos)
-    #Xs = np.nan_to_num(pos_Xs[pos],0)
-    fx = StandardScaler()
-    y2 = np.array(pos_y[pos]).astype(float)
-    X3 = sm.add_constant(pd.DataFrame(fx.fit_transform(pd.DataFrame(pos_Xs[pos])[valid_col]),columns=valid_col))
-    est = sm.OLS(y2, X3)
-    est2 = est.fit()
-    print(est2.summary())
-
-
-
-#X3.shape,y.shape
-
-
-
-len(Xso),len(y)
-
-
-
-plt.hist(y,20)
-
-
-
-Xs = np.nan_to_num(Xso,0)
-fx = StandardScaler()
-X2 = Xs#fx.fit_transform(Xs)
-y = np.array(y).astype(float)
-
-reg = ElasticNetCV([.1,.7,.725,.75,.775,.8,.9,.95,.99,1],cv=10,positive=True,max_iter=1e4)#(alpha=0.1,l1_ratio=0.7)#CV(cv=10)#ElasticNetCV(.7,cv=10,)
-#reg = lgb.LGBMRegressor()
-reg.fit(X2,y)
-print(Xs.shape,reg.score(X2,y))
-
-
-
-plt.style.use('seaborn-white')
-plt.scatter(reg.predict(X2),y,s=10,alpha=0.5)
-plt.ylim(-60,60)
-plt.xlim(-60,60)
-plt.xlabel('predicted margin')
-plt.ylabel('actual margin')
-
-
-
-#sorted([(i,n) for i,n in zip(reg.feature_importances_,exp_lbl) if 'LB' in n],reverse=True)
-
-
-
-reg.l1_ratio_
-
-
-
-exp_lbl = sum([[str(p) + '_' + str(s) for s in valid_col] for p in valid_pos],[])
-
-
-
-X3 = sm.add_constant(pd.DataFrame(X2,columns=exp_lbl))
-est = sm.OLS(y, X3)
-est2 = est.fit()
-print(est2.summary())
-
-
-
-print('home field adv is {:.1f} points'.format(reg.intercept_))
-
-
-
-future_use = defaultdict(dict)
-ratings_per_pos = reg.coef_.reshape((len(valid_pos),-1))
-df_rate = pd.DataFrame(ratings_per_pos,index=valid_pos,columns=valid_col)
-for row in df_rate.iterrows():
-    res = sorted([(abs(v),k) for k,v in row[1].items()],reverse=True)
-    print(row[0]+' : { ')
-    for i in range(len(res)):
-        if np.linalg.norm(row[1][res[i][1]]) > 0:
-            future_use[row[0]][res[i][1]] = row[1][res[i][1]]
-            print('\t{}: [{:.3f}, 1],'.format(res[i][1],row[1][res[i][1]]))
-    print('},')
-
-
-
-ratings_to_use = [k for k,v in (est2.pvalues < 0.1).items() if v if k != 'const']
-reg_small = ElasticNetCV(positive=True,cv=10)
-reg_small.fit(Xs[:,[list(exp_lbl).index(r) for r in ratings_to_use]],y)
-
-
-
-res = sorted([(abs(v),k) for k,v in zip(ratings_to_use,reg_small.coef_) if 'WR' in k],reverse=True)
-for v,k in res:
-    print('{}\t{}\t{:.3f}'.format('',k,v))
-print()
-
-
-
-
-
-
-rts = defaultdict(list)
-for file in sorted(os.listdir('.')):
-    if fnmatch.fnmatch(file, 'FBGM_League*.json'):
-        print(file)
-        data = json.load(open(file,'rt',encoding='utf-8-sig'))
-
-
-        valid_pos = set()
-        for p in data['players']:
-            for r in p['ratings']:
-                r2 = sum([future_use[r['pos']][k]*v for k,v in r.items() if type(v) == int and k != 'season' and k in future_use[r['pos']]])
-                rts[r['pos']].append((r['ovr'],r2))
-
-
-
-i=1
-for pos, results in rts.items():
-    print(pos)
-    plt.subplot(3,4,i)
-    plt.title(pos)
-    A = np.array(results)
-    plt.scatter(A[:,0],A[:,1],s=5,alpha=0.5)
-    plt.xlabel('current OVR')
-    plt.yticks([],[])
-    i+=1
-plt.suptitle('Alt OVR comp',size=18,weight='bold',y=1.02)
-plt.tight_layout()
-
-
-
-sorted([(round(sum(v.values()),2),k) for k,v in future_use.items()],reverse=True)
-
-
-
-
-
-
-rts = defaultdict(list)
-
-player_ratings = {}
-player_pos = {}
-player_r1 = {}
-player_r2 = {}
+count = {'QB':3,'RB':4,'WR':6,'TE':3,'OL':9,'K':1,'P':1,'DL':9,'LB':7,'CB':5,'S':5}
 
+# The underachieving team gets the best players below min_ovr_under, the overachieving team the worst above min_ovr_over
+min_ovr_under = {'QB':45,'RB':35,'WR':35,'TE':35,'OL':56,'K':70,'P':70,'DL':57,'LB':50,'CB':48,'S':50}
+min_ovr_over = {'QB':65,'RB':65,'WR':65,'TE':65,'OL':62,'K':50,'P':50,'DL':55,'LB':55,'CB':60,'S':60}
 
 
-for file in sorted(os.listdir('.')):
-    if fnmatch.fnmatch(file, 'FBGM_League*.json'):
+# Not cached itself, since every file's features are already cached on their own by get_cached_features. Only the
+# per position blocks come back from the workers, the game rows get read into the design matrix one file at a time.
+@pipeline.stage(params={'files': files, 'key': LEAGUE_FEATURES_KEY}, inputs=files, cache=False)
+def load(files, key):
+    leagues = map_files(partial(get_league_blocks, key=key), files)
+    for file, league in zip(files, leagues):
         print(file)
-        data = json.load(open(file,'rt',encoding='utf-8-sig'))
-
-
-        valid_pos = set()
-        for p in data['players']:
-            for r in p['ratings']:
-                r2 = sum([future_use[r['pos']][k]*v for k,v in r.items() if type(v) == int and k != 'season' and k in future_use[r['pos']]])
-                
-                key = (file,p['pid'],r['season'])
-                player_ratings[key] ={k:v for k,v in r.items() if type(v) == int and k != 'season'}
-                player_pos[key] =r['pos']
-                player_r1[key] = r['ovr']
-                player_r2[key] = r2
-
-                valid_pos.add(r['pos'])
-
-
-
-base = json.load(open('base_ur.json','rt',encoding='utf-8-sig'))
-print(len(base['players']))
-base['players'] = [_ for _ in base['players'] if _['tid'] != 31]
-base['players'] = [_ for _ in base['players'] if _['tid'] != 30]
-
-print(len(base['players']))
-if "depth" in base['teams'][-1]:
-    del base['teams'][-1]['depth']
-if "stats" in base['teams'][-1]:
-    del base['teams'][-1]['stats']
-max_pid = max([_['pid'] for _ in base['players']])
-base['gameAttributes']['userTid'] = 31
-base['gameAttributes']['userTids'] = [31]
-
-
-
-count = {'QB':3,'RB':4,'WR':6,'TE':3,'OL':9,'K':1,'P':1,'DL':9,'LB':7,'CB':5,'S':5}
-
-min_ovr = {'QB':45,'RB':35,'WR':35,'TE':35,'OL':56,'K':70,'P':70,'DL':57,'LB':50,'CB':48,'S':50}
-alt_t = []
-
-for p,N in count.items():
-    mo = min_ovr[p]
-    pc = {k:v for k,v in player_r1.items() if v < mo and player_pos[k] == p}
-    alts = sorted([(player_r2[k],k) for k in pc],reverse=True)
-    done_set = set()
-    i = 0
-    icnt = len(alt_t)
-    while len(alt_t) < icnt + N:
-        _, k = alts[i]
-        if k not in done_set:
-            player = {'ratings':[player_ratings[k]],'pos':p}
+        print(league['valid_pos'])
+    return leagues
+
+
+# Every player season in every file, one row each, with ratings as int16 columns
+@pipeline.stage(params={'files': files}, inputs=files)
+def index(files):
+    return RatingsTable.from_files(files)
+
+
+@pipeline.stage(deps=['load'], params={'files': files, 'key': LEAGUE_FEATURES_KEY})
+def features(load, files, key):
+    y = []
+
+    pos_Xs = defaultdict(list)
+    pos_y = defaultdict(list)
+    pos_min = defaultdict(list)
+
+    for league in load:
+        valid_pos = league['valid_pos']
+        valid_col = league['valid_col']
+
+        for pos in league['pos_Xs']:
+            pos_Xs[pos].append(league['pos_Xs'][pos])
+            pos_y[pos].append(league['pos_y'][pos])
+            pos_min[pos].append(league['pos_min'][pos])
+        y.extend(league['y'].tolist())
+
+    exp_lbl = sum([[str(p) + '_' + str(s) for s in valid_col] for p in valid_pos],[])
+
+    # One row per game in a float32 matrix on disk, with exp_lbl saved next to it. Each file's rows are loaded from
+    # its feature cache and written in before the next file's, so only one file's X is ever in memory.
+    design_path = pipeline.output_path('f32')
+    Xso = create_design_matrix(design_path, len(y), exp_lbl)
+    start = 0
+    for file, league in zip(files, load):
+        X = get_cached_features(file, get_league_features, key)['X']
+        Xso[start:start + league['num_rows']] = np.nan_to_num(X)
+        start += league['num_rows']
+        del X
+    Xso.flush()
+
+    return {
+        'y': np.array(y).astype(float),
+        'pos_Xs': pos_Xs,
+        'pos_y': pos_y,
+        'pos_min': pos_min,
+        'valid_pos': valid_pos,
+        'valid_col': valid_col,
+        'exp_lbl': exp_lbl,
+        'design_path': design_path,
+    }
+
+
+@pipeline.stage(deps=['features'])
+def fit(features):
+    valid_pos = features['valid_pos']
+    valid_col = features['valid_col']
+    exp_lbl = features['exp_lbl']
+    y = features['y']
+    X2, _ = open_design_matrix(features['design_path'])
+
+    pos_fits = {}
+    for pos in valid_pos:
+        # Standardized ratings, unweighted. Zip in pos_min[pos] too to weight each player season by minutes played
+        stats = SufficientStats.from_chunks(zip(features['pos_Xs'][pos], features['pos_y'][pos]))
+        pos_fits[pos] = stats.standardize().fit(names=valid_col)
+
+    # Same fit as ElasticNetCV([.1,.7,.725,.75,.775,.8,.9,.95,.99,1],cv=10,positive=True,max_iter=1e4), with the folds in parallel
+    reg = fit_elastic_net_cv(X2,y,[.1,.7,.725,.75,.775,.8,.9,.95,.99,1],cv=10,positive=True,max_iter=10000)
+
+    est2 = SufficientStats.from_data(X2, y).fit(names=exp_lbl)
+
+    # Nonzero elastic net weights for each position, biggest first
+    future_use = defaultdict(dict)
+    ratings_per_pos = reg.coef_.reshape((len(valid_pos),-1))
+    df_rate = pd.DataFrame(ratings_per_pos,index=valid_pos,columns=valid_col)
+    for row in df_rate.iterrows():
+        res = sorted([(abs(v),k) for k,v in row[1].items()],reverse=True)
+        for i in range(len(res)):
+            if np.linalg.norm(row[1][res[i][1]]) > 0:
+                future_use[row[0]][res[i][1]] = row[1][res[i][1]]
+
+    ratings_to_use = [k for k,v in zip(est2.names,est2.pvalues < 0.1) if v if k != 'const']
+    reg_small = fit_elastic_net_cv(X2[:,[list(exp_lbl).index(r) for r in ratings_to_use]],y,.5,cv=10,positive=True)
+
+    return {
+        'pos_fits': pos_fits,
+        'reg': reg,
+        'est2': est2,
+        'future_use': future_use,
+        'ratings_to_use': ratings_to_use,
+        'reg_small': reg_small,
+    }
+
+
+# Not cached, since it's quick and overunder.json has to match this run's parameters
+@pipeline.stage(deps=['index', 'fit'], params={'count': count, 'min_ovr_under': min_ovr_under, 'min_ovr_over': min_ovr_over}, inputs=['base_ur.json'], cache=False)
+def select(index, fit, count, min_ovr_under, min_ovr_over):
+    ratings = index
+    player_pos = ratings.get_pos()
+    player_r1 = ratings.column('ovr')
+    player_r2 = ratings.score(fit['future_use'])
+
+    base = json.load(open('base_ur.json','rt',encoding='utf-8-sig'))
+    print(len(base['players']))
+    base['players'] = [_ for _ in base['players'] if _['tid'] != 31]
+    base['players'] = [_ for _ in base['players'] if _['tid'] != 30]
+
+    print(len(base['players']))
+    if "depth" in base['teams'][-1]:
+        del base['teams'][-1]['depth']
+    if "stats" in base['teams'][-1]:
+        del base['teams'][-1]['stats']
+    max_pid = max([_['pid'] for _ in base['players']])
+    base['gameAttributes']['userTid'] = 31
+    base['gameAttributes']['userTids'] = [31]
+
+    alt_t = []
+
+    for p,N in count.items():
+        mo = min_ovr_under[p]
+        pc = np.flatnonzero((player_r1 < mo) & (player_pos == p))
+        for k in top_n(player_r2, pc, N, largest=True):
+            player = {'ratings':[ratings.get_dict(k)],'pos':p}
             alt_t.append(player)
-            done_set.add(k)
-        i+=1
-for p in alt_t:
-    p['born'] =  {'year': 1994, 'loc': 'USA'}
-    p['pid'] = max_pid
-    p['tid'] = 31
-    max_pid += 1
-    base['players'].append(p)
-
-
-
-min_ovr = {'QB':65,'RB':65,'WR':65,'TE':65,'OL':62,'K':50,'P':50,'DL':55,'LB':55,'CB':60,'S':60}
-
-alt_t = []
-
-for p,N in count.items():
-    mo = min_ovr[p]
-    pc = {k:v for k,v in player_r1.items() if v > mo and player_pos[k] == p}
-    alts = sorted([(player_r2[k],k) for k in pc])#,reverse=True)
-    done_set = set()
-    i = 0
-    icnt = len(alt_t)
-    while len(alt_t) < icnt + N:
-        _, k = alts[i]
-        if k not in done_set:
-            player = {'ratings':[player_ratings[k]],'pos':p}
+    for p in alt_t:
+        p['born'] =  {'year': 1994, 'loc': 'USA'}
+        p['pid'] = max_pid
+        p['tid'] = 31
+        max_pid += 1
+        base['players'].append(p)
+
+    alt_t = []
+
+    for p,N in count.items():
+        mo = min_ovr_over[p]
+        pc = np.flatnonzero((player_r1 > mo) & (player_pos == p))
+        for k in top_n(player_r2, pc, N, largest=False):
+            player = {'ratings':[ratings.get_dict(k)],'pos':p}
             alt_t.append(player)
-            done_set.add(k)
-        i+=1
-for p in alt_t:
-    p['born'] =  {'year': 1994, 'loc': 'USA'}
-    p['pid'] = max_pid
-    p['tid'] = 30
-    max_pid += 1
-    base['players'].append(p)
-
-
-
+    for p in alt_t:
+        p['born'] =  {'year': 1994, 'loc': 'USA'}
+        p['pid'] = max_pid
+        p['tid'] = 30
+        max_pid += 1
+        base['players'].append(p)
 
+    with open('overunder.json','wt') as fp:
+        json.dump(base,fp)
 
 
-with open('overunder.json','wt') as fp:
-    json.dump(base,fp)
+@pipeline.stage(deps=['index', 'features', 'fit'], cache=False)
+def report(index, features, fit):
+    report = Report('low-ovr-good-team-football')
 
+    valid_pos = features['valid_pos']
+    y = features['y']
+    X2, _ = open_design_matrix(features['design_path'])
+    reg = fit['reg']
+    future_use = fit['future_use']
 
+    for pos in valid_pos:
+        print(pos)
+        print(fit['pos_fits'][pos].summary())
 
-p
+    print(len(X2),len(y))
+    report.add('Margin',histogram(y,20))
 
+    print(X2.shape,reg.score(X2,y))
+    report.add('Predicted vs actual margin',density(reg.predict(X2),y,bins=60,range=[[-60,60],[-60,60]],xlabel='predicted margin',ylabel='actual margin'))
 
+    print('l1_ratio_',reg.l1_ratio_)
+    print(fit['est2'].summary())
+    print('home field adv is {:.1f} points'.format(reg.intercept_))
 
+    for pos in valid_pos:
+        print(pos+' : { ')
+        for k,v in future_use.get(pos, {}).items():
+            print('\t{}: [{:.3f}, 1],'.format(k,v))
+        print('},')
 
+    res = sorted([(abs(v),k) for k,v in zip(fit['ratings_to_use'],fit['reg_small'].coef_) if 'WR' in k],reverse=True)
+    for v,k in res:
+        print('{}\t{}\t{:.3f}'.format('',k,v))
+    print()
 
+    ratings = index
+    player_pos = ratings.get_pos()
+    player_r1 = ratings.column('ovr')
+    player_r2 = ratings.score(future_use)
 
+    panels = []
+    for pos in ratings.positions:
+        is_pos = player_pos == pos
+        panels.append(density(player_r1[is_pos],player_r2[is_pos],bins=40,title=pos,xlabel='current OVR',yticks=[]))
+    report.add('Alt OVR comp',panels,shape=(3,4))
 
+    print(sorted([(round(sum(v.values()),2),k) for k,v in future_use.items()],reverse=True))
 
+    report.finish()
 
 
+pipeline.run()
@@ -0,0 +1,194 @@
+"""Run a script as named stages, with each stage's output cached on disk by a hash of everything it depends on.
+
+A stage is a function registered with Pipeline.stage. It gets the outputs of the stages listed in deps plus its
+params as keyword arguments. Its cache key is a hash of its code, its params, the contents of its input files and the
+keys of its deps, so changing a threshold in one stage only reruns that stage and the ones downstream of it, and
+cached outputs are only loaded from disk if a stage that reruns needs them.
+
+Stages mostly call into the analysis package, so every key also includes a hash of the package's source files, and
+editing any of them reruns everything. When a stage reruns, the files cached for its older keys are deleted.
+
+Only low-ovr-good-team-football is split into stages. In the other scripts the slow part is reading the league
+exports or data.csv, which get_cached_features and read_csv_table already cache per file, and what's left after that
+(a few OLS fits, one json.load in pos-basketball) is quicker than unpickling stage outputs would be.
+
+Stages that write their own big files (like a memmapped design matrix) should put them at pipeline.output_path(...),
+which is unique to the stage's key and gets checked for before a cached output is reused."""
+
+import glob
+import hashlib
+import os
+import pickle
+import re
+import types
+
+from .export_cache import hash_file
+from .instrument import stage as instrument_stage
+
+# Bump this whenever the cache layout changes, so old cache files are ignored
+CACHE_VERSION = 1
+
+
+def _hash_sources():
+    """Hash of every module in the analysis package, since stage code is mostly calls into them."""
+    h = hashlib.sha1()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py'))):
+        h.update(os.path.basename(path).encode())
+        h.update(hash_file(path).encode())
+    return h.hexdigest()
+
+
+def _hash_code(code, h):
+    """Hash a function's bytecode and constants, without line numbers, so editing one stage doesn't invalidate the
+    stages defined after it."""
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _hash_code(const, h)
+        elif isinstance(const, frozenset):
+            # Set iteration order depends on string hashing, which changes between runs
+            h.update(repr(sorted(repr(c) for c in const)).encode())
+        else:
+            h.update(repr(const).encode())
+
+
+class _Stage:
+    def __init__(self, func, deps, params, inputs, cache):
+        self.name = func.__name__
+        self.func = func
+        self.deps = list(deps)
+        self.params = dict(params or {})
+        self.inputs = list(inputs)
+        self.cache = cache
+
+
+class Pipeline:
+    def __init__(self, name, cache_dir=None):
+        self.name = name
+        self.cache_dir = os.path.abspath('.cache' if cache_dir is None else cache_dir)
+        self.stages = {}
+        self._keys = {}
+        self._sources = None
+        self._running = None
+        self._output_paths = []
+
+    def stage(self, deps=(), params=None, inputs=(), cache=True):
+        """Decorator registering a stage. deps have to be registered before it. inputs are files the stage reads,
+        hashed by content. With cache=False the stage always runs, like for cheap stages that write user facing
+        files or print results."""
+        def decorator(func):
+            for dep in deps:
+                if dep not in self.stages:
+                    raise ValueError('Stage {} depends on {}, which has to be registered first'.format(func.__name__, dep))
+            self.stages[func.__name__] = _Stage(func, deps, params, inputs, cache)
+            return func
+
+        return decorator
+
+    def _get_key(self, stage):
+        h = hashlib.sha1()
+        h.update(repr((CACHE_VERSION, self.name, stage.name)).encode())
+        h.update(self._sources.encode())
+        _hash_code(stage.func.__code__, h)
+        h.update(repr(sorted(stage.params.items())).encode())
+        for path in stage.inputs:
+            h.update(hash_file(path).encode())
+        for dep in stage.deps:
+            h.update(self._keys[dep].encode())
+        return h.hexdigest()
+
+    def _prefix(self, name):
+        return os.path.join(self.cache_dir, '{}-{}-{}'.format(self.name, name, self._keys[name][:16]))
+
+    def output_path(self, suffix):
+        """Path for a file written by the stage that's running now, unique to its cache key."""
+        path = '{}.{}'.format(self._prefix(self._running), suffix)
+        self._output_paths.append(path)
+        return path
+
+    def _is_cached(self, name):
+        if not self.stages[name].cache or not os.path.exists(self._prefix(name) + '.pkl'):
+            return False
+        with open(self._prefix(name) + '.pkl', 'rb') as f:
+            output_paths = pickle.load(f)
+        return all(os.path.exists(path) for path in output_paths)
+
+    def _remove_old(self, name):
+        """Delete the files cached for this stage under any key but the current one, like old design matrices."""
+        prefix = '{}-{}-'.format(self.name, name)
+        for path in glob.glob(os.path.join(glob.escape(self.cache_dir), glob.escape(prefix) + '*')):
+            # The rest of the file name has to be a key, so another stage whose name starts with this one's is safe
+            key = re.match(r'[0-9a-f]{16}\.', os.path.basename(path)[len(prefix):])
+            if key is not None and key.group()[:-1] != self._keys[name][:16]:
+                os.remove(path)
+
+    def _load(self, name):
+        with open(self._prefix(name) + '.pkl', 'rb') as f:
+            pickle.load(f)
+            return pickle.load(f)
+
+    def _save(self, name, value):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._prefix(name) + '.pkl'
+        # Output paths first, so checking for them doesn't have to unpickle the whole value
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(self._output_paths, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+
+    def run(self):
+        """Run every stage whose output isn't cached, in registration order. Cached outputs are only loaded if a
+        stage that runs needs them, and outputs are dropped from memory once no stage left to run needs them."""
+        self._sources = _hash_sources()
+        for name, stage in self.stages.items():
+            self._keys[name] = self._get_key(stage)
+
+        # Going backwards, a stage with cache=False only has to run if it's a final stage (there for its side
+        # effects) or something that runs depends on it
+        dependents = {name: [] for name in self.stages}
+        for name, stage in self.stages.items():
+            for dep in stage.deps:
+                dependents[dep].append(name)
+        run_set = set()
+        for name in reversed(list(self.stages)):
+            if self.stages[name].cache:
+                if not self._is_cached(name):
+                    run_set.add(name)
+            elif not dependents[name] or any(d in run_set for d in dependents[name]):
+                run_set.add(name)
+        to_run = [name for name in self.stages if name in run_set]
+        for name in self.stages:
+            if name not in run_set and self.stages[name].cache:
+                print('[{}] cached'.format(name))
+
+        pending = {name: 0 for name in self.stages}
+        for name in to_run:
+            for dep in self.stages[name].deps:
+                pending[dep] += 1
+
+        values = {}
+        for name in to_run:
+            stage = self.stages[name]
+            kwargs = dict(stage.params)
+            for dep in stage.deps:
+                if dep not in values:
+                    values[dep] = self._load(dep)
+                kwargs[dep] = values[dep]
+
+            print('[{}] running'.format(name))
+            self._running = name
+            self._output_paths = []
+            with instrument_stage(name):
+                value = stage.func(**kwargs)
+            if stage.cache:
+                self._save(name, value)
+                self._remove_old(name)
+            self._running = None
+
+            if pending[name] > 0:
+                values[name] = value
+            for dep in stage.deps:
+                pending[dep] -= 1
+                if pending[dep] == 0:
+                    del values[dep]
@@ -1,10 +1,11 @@
-import pandas as pd
+import os
+import sys
 import numpy as np
-import matplotlib.pyplot as plt
 from sklearn.linear_model import LinearRegression
 
-dataset = pd.read_csv('data.csv')
-dataset = dataset[dataset.MP * dataset.G > 820]
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from analysis.csv_table import RATING, read_csv_table
+from analysis.report import Report, density
 
 ratings_regression = ['Hgt', 'Str', 'Spd', 'Jmp', 'End', 'Ins', 'Dnk', 'FT.1', '3Pt', 'oIQ', 'dIQ', 'Drb', 'Pss']
 ratings_skip = ['2Pt', 'Reb']
@@ -12,6 +13,11 @@ factor_skip = 0.01
 
 ratings = ratings_regression + ratings_skip
 
+# FT.1 is the FT rating, since pandas renames the second FT column (the first is the FT stat)
+columns = {'MP': 'float64', 'G': RATING, '+/-': 'float64'}
+columns.update((rating, RATING) for rating in ratings)
+dataset = read_csv_table('data.csv', columns, where='MP * G > 820')
+
 dataset['pmPerMin'] = dataset['+/-'] / dataset['MP']
 
 # CRAP! normalize doesn't actually do zscore, so some of the stuff below is wrong! Might not matter much
@@ -64,12 +70,6 @@ print(') + ' + formatThree(factor_add));
 
 
 # Plot
-dataset.plot.hexbin(x='OvrOld', y='OvrNew', gridsize=20)
-plt.xlim(0, 100)
-plt.ylim(0, 100)
-plt.xlabel('Old Ovr')  
-plt.ylabel('New Ovr')  
-
-plt.plot([0, 100], [0, 100])
-
-plt.show()
+report = Report('player-ovr-basketball')
+report.add('Ovr', density(dataset['OvrOld'], dataset['OvrNew'], bins=20, range=[[0, 100], [0, 100]], xlabel='Old Ovr', ylabel='New Ovr', lines=[([0, 100], [0, 100])]))
+report.finish()
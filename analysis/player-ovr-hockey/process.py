@@ -1,10 +1,11 @@
-import pandas as pd
+import os
+import sys
 import numpy as np
 import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
 
-dataset = pd.read_csv('data.csv')
-dataset = dataset[dataset.TOI * dataset.G > 820]
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from analysis.csv_table import RATING, read_csv_table
+from analysis.regression import fit_linear
 
 ratings_regression = ['Hgt', 'Str', 'Spd', 'End', 'Pss', 'Wst', 'Sst', 'Stk', 'oIQ', 'Chk', 'Blk', 'Fcf', 'dIQ', 'Glk']
 ratings_skip = []
@@ -12,10 +13,11 @@ factor_skip = 0.01
 
 ratings = ratings_regression + ratings_skip
 
+columns = {'TOI': 'float64', 'G': RATING, '+/-': 'float64'}
+columns.update((rating, RATING) for rating in ratings)
+dataset = read_csv_table('data.csv', columns, where='TOI * G > 820')
+
 dataset['pmPerMin'] = dataset['+/-'] / dataset['TOI']
 
 # CRAP! normalize doesn't actually do zscore, so some of the stuff below is wrong! Might not matter much
-reg = LinearRegression(normalize=True)
-reg.fit(dataset[ratings], dataset['pmPerMin'])
-print('Intercept: \n', reg.intercept_)
-print('Coefficients: \n', reg.coef_)
+reg = fit_linear(dataset, ratings, 'pmPerMin', normalize=True)
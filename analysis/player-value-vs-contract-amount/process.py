@@ -1,8 +1,12 @@
-import json
-import matplotlib.pyplot as plt
+import os
+import sys
 import pandas as pd
 from sklearn.linear_model import LinearRegression
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from analysis.league_export import iter_records
+from analysis.report import Report, density
+
 params = {
     "basketball": {
         "ovrMean": 44.88120567375886,
@@ -16,19 +20,18 @@ params = {
     },
 }
 
+report = Report('player-value-vs-contract-amount')
+
 for sport in ["basketball", "football"]:
     values = []
     amounts = []
 
-    with open(f'{sport}.json', encoding='utf-8-sig') as f:
-        data = json.load(f)
-
-        for p in data['players']:
-            if p['tid'] < -1:
-                continue
+    for p in iter_records(f'{sport}.json', 'players'):
+        if p['tid'] < -1:
+            continue
 
-            values.append((p['value'] - params[sport]['ovrMean']) / params[sport]['ovrStd'])
-            amounts.append(p['contract']['amount'] / params[sport]['salaryCap'])
+        values.append((p['value'] - params[sport]['ovrMean']) / params[sport]['ovrStd'])
+        amounts.append(p['contract']['amount'] / params[sport]['salaryCap'])
 
     df = pd.DataFrame(data={ "value": values, "amount": amounts })
     print(df)
@@ -38,8 +41,7 @@ for sport in ["basketball", "football"]:
     print('Intercept: \n', reg.intercept_)
     print('Coefficients: \n', reg.coef_)
 
-    amount_fit = reg.predict(df[['value']])
+    value_range = [df['value'].min(), df['value'].max()]
+    report.add(sport, density(df['value'], df['amount'], bins=40, log=True, xlabel='value', ylabel='amount', lines=[(value_range, reg.predict(pd.DataFrame({'value': value_range})))]))
 
-    df.plot.scatter(x='value', y='amount')
-    plt.plot(df[['value']], amount_fit, color='blue', linewidth=3)
-    plt.show()
+report.finish()
@@ -0,0 +1,48 @@
+import multiprocessing
+import os
+
+from .instrument import instrumented
+
+
+def get_num_processes(processes=None):
+    """processes, defaulting to the ANALYSIS_PROCESSES environment variable if set or else the number of cores."""
+    if processes is None:
+        processes = int(os.environ.get('ANALYSIS_PROCESSES', os.cpu_count() or 1))
+    return processes
+
+
+def map_tasks(func, tasks, processes=None, chunksize=1):
+    """Call func(task) for every task in worker processes and return the results in order. Where fork isn't
+    available, like on Windows, the tasks just run one after another in this process.
+
+    func has to be importable (defined in a module, not in a process.py script) so it can be sent to the workers.
+    It gets pickled once per chunk of tasks, so if it carries a lot of data (like a partial with a big array), use
+    map_chunks instead."""
+    tasks = list(tasks)
+    processes = min(get_num_processes(processes), len(tasks))
+
+    # The process.py scripts have no __main__ guard, so workers have to be forked. Spawning them (the only option on
+    # Windows) would re-run the script in each one, so without fork everything runs in this process instead.
+    if processes <= 1 or 'fork' not in multiprocessing.get_all_start_methods():
+        return [func(task) for task in tasks]
+
+    with multiprocessing.get_context('fork').Pool(processes) as pool:
+        return pool.map(func, tasks, chunksize=chunksize)
+
+
+def map_chunks(func, tasks, processes=None):
+    """map_tasks with the tasks split into one chunk per worker, so func only gets pickled once per worker. For a
+    func that carries a lot of data, like a partial with big arrays that every task reads."""
+    tasks = list(tasks)
+    processes = max(1, min(get_num_processes(processes), len(tasks)))
+    return map_tasks(func, tasks, processes, chunksize=-(-len(tasks) // processes))
+
+
+@instrumented()
+def map_files(func, files, processes=None):
+    """Call func(file) for every file, each in its own worker process, and return the results in sorted file order.
+
+    func has to be importable, like for map_tasks. processes defaults to the number of cores, or the
+    ANALYSIS_PROCESSES environment variable if set."""
+    # chunksize 1 because each file is a big chunk of work on its own
+    return map_tasks(func, sorted(files), processes)
@@ -1,10 +1,13 @@
 import os
+import sys
 import json
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from collections import defaultdict
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from analysis.position import PositionPredictor
+from analysis.report import Report, density
+from analysis.suffstats import SufficientStats
 
 dirname = os.path.dirname(__file__)
 filename = os.path.join(dirname, '../../data/real-player-data.basketball.json')
@@ -19,61 +22,50 @@ print(df)
 
 cols = list(df.columns[2:])
 
-ratings = defaultdict(list)
-for row in df.itertuples():
-    ratings[row[1]].append(row[3:])
-print(ratings)
-
-X = []
-names = []
 pos_idx = {'PG':0,'SG':1,'SF':2,'PF':3,'C':4,'G':0.5,'F':2.5,'FC':3.5,'GF':1.5}
 
 # okay but aren't GFs closer to PGs than SGs? Hair better results but obv different predictions
 #pos_idx = {'PG':1,'SG':0,'SF':2,'PF':3,'C':4,'G':0.5,'F':2.5,'FC':3.5,'GF':1.5}
 
-for k,p in data['bios'].items():
-    pos = pos_idx[p['pos']]
-    for y in ratings[k]:
-        names.append(p['name'])
-        X.append([pos] + list(y))
+# Every ratings season joined to its player's bio, players in bios order and seasons in ratings order within each
+bios = pd.DataFrame.from_dict(data['bios'],orient='index')[['name','pos']]
+bios['bio_order'] = np.arange(len(bios))
+df = df.merge(bios,left_on='slug',right_index=True,how='inner').sort_values('bio_order',kind='mergesort').reset_index(drop=True)
 
-X=np.array(X)
-y = X[:,0]
+pos_codes = pd.Categorical(df['pos'],categories=list(pos_idx)).codes
+if np.any(pos_codes < 0):
+    raise KeyError('Unknown positions: {}'.format(sorted(set(df['pos'][pos_codes < 0]))))
+y = np.array(list(pos_idx.values()))[pos_codes]
+X = df[cols].astype(float)
 #X = X/np.mean(X[:,[False] + [_ != 'hgt2' for _ in cols]],axis=1,keepdims=1)
-X = pd.DataFrame(X[:,1:],columns=cols)
-
-import statsmodels.api as sm
 
-clf = sm.OLS(y,sm.add_constant(X)).fit()#_regularized(alpha=1e-9, L1_wt=0.0001)
+clf = SufficientStats.from_data(X,y).fit(names=cols)
 #clf = svm.LinearSVR()
 #clf.fit(X,y)
 #clf = sm.Logit(y/4,sm.add_constant(X)).fit()
 print(clf.summary())
 
-print(np.linalg.norm(y-clf.predict(sm.add_constant(X))))
+print(np.linalg.norm(y-clf.predict(X)))
 print(clf.params)
 
-pred = clf.predict(sm.add_constant(X))
-plt.figure(dpi=200)
-plt.scatter(y,pred,s=2,alpha=0.01)
-plt.ylim(0,4)
+# Saved so other scripts can predict positions for whole exports with PositionPredictor.load
+predictor = PositionPredictor.from_fit(clf,pos_idx)
+predictor.save(os.path.join(dirname, 'pos-model.json'))
+
+pred = predictor.predict_values(X)
+report = Report('pos-basketball')
 yp = list(pos_idx.keys())
-plt.yticks([pos_idx[k] for k in yp],yp)
-plt.xticks([pos_idx[k] for k in yp],yp)
+ticks = ([pos_idx[k] for k in yp],yp)
+# One column of bins per position number, so it's like the faint scatter plot but binned
+report.add('Predicted vs actual position',density(y,pred,bins=[np.arange(-0.25,4.5,0.5),80],range=[[-0.25,4.25],[0,4]],log=True,xticks=ticks,yticks=ticks),dpi=200)
 
 from collections import Counter
-def get_pos(x):
-    inv_pos_idx = [(abs(v-x),k) for k,v in pos_idx.items()]
-    return sorted(inv_pos_idx)[0]
+# Rows by slug, since different players can share a name. Each name is the first player in bios order with it.
+slug_rows = df.groupby('slug').indices
+name_slugs = df.drop_duplicates('name').set_index('name')['slug']
 
 for n in ['LeBron James','Michael Jordan','Kobe Bryant','Chris Paul','James Harden','Stephen Curry','Kawhi Leonard','Tim Duncan','Kevin Garnett','Karl Malone','John Stockton']:
-    idx = names.index(n)
-    for i in range(idx,len(names)):
-        if names[i] != n:
-            break
-    
-    p = [get_pos(pred[j]) for j in range(idx,i)]
-    print(n,dict(Counter([_[1] for _ in p])))
-
-
+    p = predictor.nearest_labels(pred[slug_rows[name_slugs[n]]])
+    print(n,dict(Counter(p.tolist())))
 
+report.finish()
@@ -0,0 +1,76 @@
+import json
+
+import numpy as np
+
+from .export_cache import load_tables
+
+
+class PositionPredictor:
+    """Basketball position from ratings, using the linear model fit by pos-basketball.
+
+    The model predicts a position number (like PG = 0 through C = 4, with hybrids in between) which gets snapped to
+    the nearest label in pos_idx. That's a searchsorted into the midpoints between consecutive labels, so a whole
+    export is scored in a couple of vectorized calls."""
+
+    def __init__(self, intercept, coef, rating_cols, pos_idx):
+        self.intercept = float(intercept)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.rating_cols = list(rating_cols)
+        self.pos_idx = dict(pos_idx)
+
+        # Labels sorted by position number, and the boundaries between neighbors. Exactly on a boundary, the label
+        # that sorts first by name wins, like picking the min of (distance, label) tuples. For the same reason, of
+        # several labels with the same position number only the first by name can ever be picked.
+        order = sorted(self.pos_idx, key=lambda k: (self.pos_idx[k], k))
+        order = [k for i, k in enumerate(order) if i == 0 or self.pos_idx[k] != self.pos_idx[order[i - 1]]]
+        self._labels = np.array(order)
+        values = np.array([self.pos_idx[k] for k in order], dtype=np.float64)
+        self._boundaries = (values[1:] + values[:-1]) / 2
+        self._left_wins_ties = self._labels[:-1] < self._labels[1:]
+
+    @classmethod
+    def from_fit(cls, fit, pos_idx):
+        """From a LinearFit of position number on ratings, where the names after 'const' are the rating columns."""
+        return cls(fit.intercept, fit.coef, fit.names[1:], pos_idx)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            model = json.load(f)
+        return cls(model['intercept'], model['coef'], model['rating_cols'], model['pos_idx'])
+
+    def save(self, path):
+        model = {
+            'intercept': self.intercept,
+            'coef': self.coef.tolist(),
+            'rating_cols': self.rating_cols,
+            'pos_idx': self.pos_idx,
+        }
+        with open(path, 'w') as f:
+            json.dump(model, f, indent=2)
+
+    def predict_values(self, ratings):
+        """Position numbers for many players at once. ratings is a 2D array with columns in rating_cols order, or
+        anything with a column per rating like a DataFrame or a player_ratings table."""
+        if hasattr(ratings, 'keys'):
+            X = np.column_stack([np.asarray(ratings[col], dtype=np.float64) for col in self.rating_cols])
+        else:
+            X = np.asarray(ratings, dtype=np.float64)
+        return X @ self.coef + self.intercept
+
+    def nearest_labels(self, values):
+        """The label nearest to each position number."""
+        values = np.asarray(values, dtype=np.float64)
+        idx = np.searchsorted(self._boundaries, values, side='right')
+        on_boundary = (idx > 0) & (values == self._boundaries[np.maximum(idx - 1, 0)])
+        idx[on_boundary & self._left_wins_ties[np.maximum(idx - 1, 0)]] -= 1
+        return self._labels[idx]
+
+    def predict(self, ratings):
+        """Position labels for many players at once, same input as predict_values."""
+        return self.nearest_labels(self.predict_values(ratings))
+
+    def predict_export(self, path):
+        """(pid, season, pos) arrays with a predicted position for every ratings row in a league export."""
+        ratings = load_tables(path)['player_ratings']
+        return ratings['pid'], ratings['season'], self.predict(ratings)
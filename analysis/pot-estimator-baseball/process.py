@@ -1,10 +1,10 @@
-import pandas as pd
+import os
+import sys
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
 
-dataset = pd.read_csv('data.csv')
-dataset = dataset[dataset.Age <= 28]
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from analysis.csv_table import RATING, read_csv_table
+from analysis.regression import fit_groups
 
 positions = [
     "SP",
@@ -19,25 +19,19 @@ positions = [
 	"RF",
 	"DH",
 ]
-for pos in positions:
-    dataset['AgeOvr' + pos] = dataset['Age'] * dataset['Ovr' + pos]
-    reg = LinearRegression()
-    reg.fit(dataset[['Age', 'Ovr' + pos, 'AgeOvr' + pos]], dataset['Pot' + pos])
-    print(pos)
-    print('Intercept: \n', reg.intercept_)
-    print('Coefficients: \n', reg.coef_)
-
-    '''
-    dataset['Pot_pred'] = reg.predict(dataset[['Age', 'Ovr' + pos, 'AgeOvr' + pos]])
-    print(dataset[['Age', 'Ovr' + pos, 'Pot' + pos, 'Pot_pred']])
 
-    dataset.plot.hexbin(x='Pot' + pos, y='Pot_pred', gridsize=20)
-    plt.xlim(0, 100)
-    plt.ylim(0, 100)
-    plt.xlabel('Pot' + pos)  
-    plt.ylabel('Pot_pred')  
+# Only the columns the regressions use
+columns = {'Age': RATING}
+for pos in positions:
+    columns['Ovr' + pos] = RATING
+    columns['Pot' + pos] = 'float64'
+dataset = read_csv_table('data.csv', columns, where='Age <= 28')
 
-    plt.plot([0, 100], [0, 100])
+# Every position's (Age, Ovr, Age*Ovr) -> Pot regression solved together, with the positions stacked into one design
+age = np.tile(dataset['Age'].values, len(positions))
+ovr = dataset[['Ovr' + pos for pos in positions]].values.T.ravel()
+pot = dataset[['Pot' + pos for pos in positions]].values.T.ravel()
+group = np.repeat(np.arange(len(positions)), len(dataset))
+table = fit_groups(np.column_stack([age, ovr, age * ovr]), pot, group, positions, ['Age', 'Ovr', 'AgeOvr'])
 
-    plt.show()
-    '''
+# python -m analysis pot-estimator --sport baseball --plot plots Pot against the fitted Pot_pred
@@ -1,25 +1,18 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
+import os
+import sys
 
-dataset = pd.read_csv('data.csv')
-dataset = dataset[dataset.Age <= 28]
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from analysis.csv_table import RATING, read_csv_table
+from analysis.regression import fit_linear
+from analysis.report import Report, density
 
-reg = LinearRegression()
-reg.fit(dataset[['Age', 'Ovr']], dataset['Pot'])
-print('Intercept: \n', reg.intercept_)
-print('Coefficients: \n', reg.coef_)
+dataset = read_csv_table('data.csv', {'Age': RATING, 'Ovr': RATING, 'Pot': 'float64'}, where='Age <= 28')
+
+reg = fit_linear(dataset, ['Age', 'Ovr'], 'Pot')
 dataset['Pot_pred'] = reg.predict(dataset[['Age', 'Ovr']])
 
 print(dataset[['Age', 'Ovr', 'Pot', 'Pot_pred']])
 
-dataset.plot.hexbin(x='Pot', y='Pot_pred', gridsize=20)
-plt.xlim(0, 100)
-plt.ylim(0, 100)
-plt.xlabel('Pot')  
-plt.ylabel('Pot_pred')  
-
-plt.plot([0, 100], [0, 100])
-
-plt.show()
+report = Report('pot-estimator-basketball')
+report.add('Pot', density(dataset['Pot'], dataset['Pot_pred'], bins=20, range=[[0, 100], [0, 100]], xlabel='Pot', ylabel='Pot_pred', lines=[([0, 100], [0, 100])]))
+report.finish()
@@ -1,33 +1,20 @@
+import os
+import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
 
-dataset = pd.read_csv('data.csv')
-dataset = dataset[dataset.Age <= 28]
-dataset['AgeOvr'] = dataset['Age'] * dataset['Ovr']
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from analysis.csv_table import RATING, read_csv_table
+from analysis.regression import fit_groups
 
-positions = ['C', 'W', 'D', 'G']
-for pos in positions:
-    subset = dataset[dataset['Pos'] == pos]
-
-    reg = LinearRegression()
-    reg.fit(subset[['Age', 'Ovr', 'AgeOvr']], subset['Pot'])
-    print(pos)
-    print('Intercept: \n', reg.intercept_)
-    print('Coefficients: \n', reg.coef_)
+dataset = read_csv_table('data.csv', {'Age': RATING, 'Ovr': RATING, 'Pos': str, 'Pot': 'float64'}, where='Age <= 28')
 
-    '''
-    subset['Pot_pred'] = reg.predict(subset[['Age', 'Ovr']])
-    print(subset[['Age', 'Ovr', 'Pot', 'Pot_pred']])
-
-    subset.plot.hexbin(x='Pot', y='Pot_pred', gridsize=20)
-    plt.xlim(0, 100)
-    plt.ylim(0, 100)
-    plt.xlabel('Pot')  
-    plt.ylabel('Pot_pred')  
+positions = ['C', 'W', 'D', 'G']
 
-    plt.plot([0, 100], [0, 100])
+# Every position's (Age, Ovr, Age*Ovr) -> Pot regression solved together, grouping rows by Pos instead of subsetting
+age = dataset['Age'].values
+ovr = dataset['Ovr'].values
+group = pd.Categorical(dataset['Pos'], categories=positions).codes
+table = fit_groups(np.column_stack([age, ovr, age * ovr]), dataset['Pot'].values, group, positions, ['Age', 'Ovr', 'AgeOvr'])
 
-    plt.show()
-    '''
+# python -m analysis pot-estimator --sport hockey --plot plots Pot against the fitted Pot_pred
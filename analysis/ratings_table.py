@@ -0,0 +1,125 @@
+import numpy as np
+
+from .export_cache import find_rows, load_tables
+
+
+class RatingsTable:
+    """Every player season's ratings from one or more league exports, stored as a few compact arrays instead of a
+    dict per player season.
+
+    Ratings are one int16 (rows, rating_cols) matrix, pos is an int8 code into positions (sorted names) and file,
+    pid and season identify each row. There's one row per (file, pid, season), the last one in the export, same as
+    a dict keyed on that would keep."""
+
+    def __init__(self, file, pid, season, pos, positions, ratings, rating_cols):
+        self.file = file
+        self.pid = pid
+        self.season = season
+        self.pos = pos
+        self.positions = positions
+        self.ratings = ratings
+        self.rating_cols = rating_cols
+
+    @classmethod
+    def from_tables(cls, player_ratings, file=0):
+        """Table for one export's player_ratings table. Ratings are all its integer columns other than pid and
+        season."""
+        rating_cols = [k for k, v in player_ratings.items() if v.dtype.kind == 'i' and k not in ['pid', 'season']]
+
+        pid = player_ratings['pid']
+        season = player_ratings['season']
+        keep = find_rows([pid, season], [pid, season], keep='last')
+        keep = np.unique(keep)
+
+        ratings = np.empty((len(keep), len(rating_cols)), dtype=np.int16)
+        for j, col in enumerate(rating_cols):
+            values = player_ratings[col][keep]
+            if len(values) > 0 and (values.min() < np.iinfo(np.int16).min or values.max() > np.iinfo(np.int16).max):
+                raise ValueError('Rating {} does not fit in int16'.format(col))
+            ratings[:, j] = values
+
+        positions, pos = np.unique(player_ratings['pos'][keep], return_inverse=True)
+
+        return cls(
+            np.full(len(keep), file, dtype=np.int16),
+            pid[keep].astype(np.int32),
+            season[keep].astype(np.int16),
+            pos.astype(np.int8),
+            positions.tolist(),
+            ratings,
+            rating_cols,
+        )
+
+    @classmethod
+    def from_files(cls, files):
+        """Table for several exports, in the order given. The file column is each row's index into files."""
+        tables = [cls.from_tables(load_tables(file)['player_ratings'], i) for i, file in enumerate(files)]
+
+        rating_cols = tables[0].rating_cols
+        if any(t.rating_cols != rating_cols for t in tables):
+            raise ValueError('Exports have different rating columns')
+
+        positions = sorted(set(pos for t in tables for pos in t.positions))
+        pos = [np.searchsorted(positions, t.positions).astype(np.int8)[t.pos] for t in tables]
+
+        return cls(
+            np.concatenate([t.file for t in tables]),
+            np.concatenate([t.pid for t in tables]),
+            np.concatenate([t.season for t in tables]),
+            np.concatenate(pos),
+            positions,
+            np.concatenate([t.ratings for t in tables]),
+            rating_cols,
+        )
+
+    def __len__(self):
+        return len(self.pid)
+
+    def find(self, pids, seasons, files=None):
+        """Row for each (pid, season), or (file, pid, season) if files is given, or -1 where there's none."""
+        if files is None:
+            return find_rows([self.pid, self.season], [pids, seasons])
+        return find_rows([self.file, self.pid, self.season], [files, pids, seasons])
+
+    def column(self, col):
+        return self.ratings[:, self.rating_cols.index(col)]
+
+    def get_pos(self, rows=None):
+        """Position names, for every row or just some."""
+        pos = self.pos if rows is None else self.pos[rows]
+        return np.array(self.positions)[pos]
+
+    def get_dict(self, row):
+        """One row's ratings as a {rating: value} dict, like in the export."""
+        return dict(zip(self.rating_cols, self.ratings[row].tolist()))
+
+    def score(self, weights):
+        """Sum of weights[pos][rating] * rating for every row, like an ovr formula with different coefficients at
+        each position. Positions or ratings missing from weights count as 0.
+
+        This is one matrix-vector product per position rather than a loop over rows."""
+        coef = np.zeros((len(self.positions), len(self.rating_cols)))
+        for i, pos in enumerate(self.positions):
+            for col, w in weights.get(pos, {}).items():
+                coef[i, self.rating_cols.index(col)] = w
+
+        scores = np.zeros(len(self))
+        for i in range(len(self.positions)):
+            mask = self.pos == i
+            scores[mask] = self.ratings[mask] @ coef[i]
+        return scores
+
+
+def top_n(scores, rows, n, largest=True):
+    """The n of rows with the highest scores (or lowest, if not largest), best first, like the first n of
+    sorted((scores[row], row) for row in rows) (with reverse=True if largest).
+
+    np.partition finds the nth best score, and only the rows at least that good get sorted, instead of all of them.
+    Ties go to later rows when largest and earlier rows otherwise, same as sorting the tuples."""
+    rows = np.asarray(rows)
+    keys = -scores[rows] if largest else scores[rows]
+    tiebreak = -rows if largest else rows
+    if len(rows) > n:
+        keep = keys <= np.partition(keys, n - 1)[n - 1]
+        rows, keys, tiebreak = rows[keep], keys[keep], tiebreak[keep]
+    return rows[np.lexsort((tiebreak, keys))[:n]]
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+from .suffstats import solve_groups
+
+
+def fit_linear(dataset, x_cols, y_col, label=None, **kwargs):
+    """Fit a LinearRegression of y_col on x_cols and print the intercept and coefficients.
+
+    label is printed first, if given, for scripts that fit one model per position. Extra kwargs go to
+    LinearRegression."""
+    # sklearn is slow to import, so it's only loaded by the fits that use it
+    from sklearn.linear_model import LinearRegression
+
+    reg = LinearRegression(**kwargs)
+    reg.fit(dataset[x_cols], dataset[y_col])
+
+    if label is not None:
+        print(label)
+    print('Intercept: \n', reg.intercept_)
+    print('Coefficients: \n', reg.coef_)
+
+    return reg
+
+
+def fit_groups(X, y, group, labels, x_cols):
+    """One OLS per group, like fit_linear on each group's rows but solved together, printed as one table.
+
+    X has columns x_cols, group is each row's index into labels, and rows with a negative group are skipped. Returns
+    the table, a DataFrame with a row per label and columns Intercept, x_cols, r2 and n."""
+    group = np.asarray(group)
+    keep = group >= 0
+    intercepts, coefs, r2 = solve_groups(np.asarray(X)[keep], np.asarray(y)[keep], group[keep], len(labels))
+
+    table = pd.DataFrame(coefs, index=labels, columns=x_cols)
+    table.insert(0, 'Intercept', intercepts)
+    table['r2'] = r2
+    table['n'] = np.bincount(group[keep], minlength=len(labels))
+    print(table)
+
+    return table
+
+
+def print_coef_intervals(dataset, x_cols, y_col, k=10, num_bootstrap=1000, level=0.95, seed=0):
+    """Refit the same OLS as fit_linear on K-fold training sets and bootstrap samples of dataset, and print each
+    coefficient's spread and bootstrap confidence interval, plus the out of fold r2.
+
+    This only needs the dataset that's already been extracted, so it's cheap to run after the main fit."""
+    from .resample import get_intervals, resample_coefs
+
+    X = np.column_stack([np.asarray(dataset[col], dtype=np.float64) for col in x_cols])
+    results = resample_coefs(X, dataset[y_col], k=k, num_bootstrap=num_bootstrap, seed=seed)
+
+    low, high = get_intervals(results['bootstrap'], level)
+    names = ['Intercept'] + list(x_cols)
+    width = max(len(name) for name in names)
+    header = '{} bootstrap samples, {:.0f}% intervals'.format(num_bootstrap, level * 100)
+    print(header)
+    print('{:<{}} {:>10} {:>10} {:>10} {:>10} {:>10}'.format('', width, 'mean', 'std', 'low', 'high', 'kfold std'))
+    for i, name in enumerate(names):
+        print('{:<{}} {:>10.4f} {:>10.4f} {:>10.4f} {:>10.4f} {:>10.4f}'.format(
+            name, width, results['bootstrap'][:, i].mean(), results['bootstrap'][:, i].std(), low[i], high[i], results['kfold'][:, i].std()))
+    print('{}-fold out of fold r2: {:.4f} +/- {:.4f}'.format(k, results['kfold_r2'].mean(), results['kfold_r2'].std()))
+
+    return results
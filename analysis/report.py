@@ -0,0 +1,173 @@
+"""Figures for the analysis scripts, pre-aggregated and rendered headless.
+
+Scripts describe their figures with density, histogram and curves panels and add them to a Report. Point clouds are
+binned with np.histogram2d as soon as they're added, so a figure only ever holds a small grid of counts no matter
+how many rows went into it. At the end of the script, report.finish() either shows everything interactively like
+plt.show() always did, or, with ANALYSIS_REPORT set to a directory, renders every figure to a PNG in worker processes
+(no display needed) and writes an index.html linking them:
+
+    ANALYSIS_REPORT=report python process.py
+
+Each run replaces that script's previous report, in ANALYSIS_REPORT/<report name>/."""
+
+import html
+import os
+import re
+
+import numpy as np
+
+from .instrument import instrumented
+from .pool import map_tasks
+
+# Default size of a single panel in inches. Grids scale up from this.
+PANEL_SIZE = (6.4, 4.8)
+
+
+def density(x, y, bins=50, range=None, log=False, **options):
+    """Panel showing where (x, y) points fall, as a 2D histogram instead of one marker per point.
+
+    bins and range are passed to np.histogram2d, so range=[[xmin, xmax], [ymin, ymax]] also sets the axis limits
+    and drops points outside it. log colors by log count, for when a few bins hold most of the points."""
+    counts, xedges, yedges = np.histogram2d(np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64), bins=bins, range=range)
+    return dict(options, kind='density', counts=counts, xedges=xedges, yedges=yedges, log=log)
+
+
+def histogram(values, bins=10, range=None, **options):
+    """Panel with a histogram of some values, counted with np.histogram up front."""
+    counts, edges = np.histogram(np.asarray(values, dtype=np.float64), bins=bins, range=range)
+    return dict(options, kind='histogram', counts=counts, edges=edges)
+
+
+def curves(series, x=None, **options):
+    """Panel with one line per entry in series, a dict of label to y values."""
+    series = {label: np.asarray(y, dtype=np.float64) for label, y in series.items()}
+    return dict(options, kind='curves', series=series, x=x)
+
+
+def _set_ticks(set_ticks, set_labels, ticks):
+    """Ticks are (positions, labels), or just positions."""
+    if isinstance(ticks, tuple):
+        set_ticks(ticks[0])
+        set_labels(ticks[1])
+    else:
+        set_ticks(ticks)
+
+
+def _draw_panel(ax, panel):
+    kind = panel['kind']
+    if kind == 'density':
+        from matplotlib.colors import LogNorm
+
+        counts = np.ma.masked_equal(panel['counts'].T, 0)
+        ax.pcolormesh(panel['xedges'], panel['yedges'], counts, cmap='Blues', norm=LogNorm() if panel['log'] else None)
+        ax.set_xlim(panel['xedges'][0], panel['xedges'][-1])
+        ax.set_ylim(panel['yedges'][0], panel['yedges'][-1])
+    elif kind == 'histogram':
+        edges = panel['edges']
+        ax.hist(edges[:-1], edges, weights=panel['counts'])
+    elif kind == 'curves':
+        for label, y in panel['series'].items():
+            ax.plot(np.arange(len(y)) if panel['x'] is None else panel['x'], y, label=label)
+        ax.legend()
+
+    # Reference lines drawn on top, like y = x, as (xs, ys)
+    for xs, ys in panel.get('lines', []):
+        ax.plot(xs, ys)
+
+    if 'title' in panel:
+        ax.set_title(panel['title'])
+    if 'xlabel' in panel:
+        ax.set_xlabel(panel['xlabel'])
+    if 'ylabel' in panel:
+        ax.set_ylabel(panel['ylabel'])
+    if 'xlim' in panel:
+        ax.set_xlim(*panel['xlim'])
+    if 'ylim' in panel:
+        ax.set_ylim(*panel['ylim'])
+    if 'xticks' in panel:
+        _set_ticks(ax.set_xticks, ax.set_xticklabels, panel['xticks'])
+    if 'yticks' in panel:
+        _set_ticks(ax.set_yticks, ax.set_yticklabels, panel['yticks'])
+
+
+def _draw_figure(fig, figure):
+    rows, cols = figure['shape']
+    for i, panel in enumerate(figure['panels']):
+        _draw_panel(fig.add_subplot(rows, cols, i + 1), panel)
+    if figure['title'] is not None:
+        fig.suptitle(figure['title'], size=18 if len(figure['panels']) > 1 else None)
+        fig.tight_layout(rect=(0, 0, 1, 0.95))
+    else:
+        fig.tight_layout()
+
+
+def _render_file(task):
+    """Draw one figure straight onto an Agg canvas and save it, without pyplot, so it works in any worker process."""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    path, figure = task
+    fig = Figure(figsize=figure['size'], dpi=figure['dpi'])
+    FigureCanvasAgg(fig)
+    _draw_figure(fig, figure)
+    fig.savefig(path)
+    return path
+
+
+def _slugify(title):
+    return re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-')
+
+
+class Report:
+    """All the figures from one run of a script."""
+
+    def __init__(self, name, out_dir=None):
+        self.name = name
+        self.out_dir = os.environ.get('ANALYSIS_REPORT') if out_dir is None else out_dir
+        self.figures = []
+
+    def add(self, title, panels, shape=None, dpi=100):
+        """Add a figure made of one or more panels, laid out in a (rows, cols) grid, by default one row."""
+        if isinstance(panels, dict):
+            panels = [panels]
+        if shape is None:
+            shape = (1, len(panels))
+        size = (PANEL_SIZE[0] * min(shape[1], 2), PANEL_SIZE[1] * min(shape[0], 2))
+        self.figures.append({'title': title, 'panels': panels, 'shape': shape, 'size': size, 'dpi': dpi})
+
+    @instrumented('report.render')
+    def render(self, processes=None):
+        """Write every figure to a PNG plus an index.html, replacing this report's files from any earlier run.
+        Returns the path to index.html."""
+        report_dir = os.path.join(self.out_dir, _slugify(self.name))
+        os.makedirs(report_dir, exist_ok=True)
+        for name in os.listdir(report_dir):
+            if name.endswith('.png'):
+                os.remove(os.path.join(report_dir, name))
+
+        tasks = []
+        for i, figure in enumerate(self.figures):
+            filename = '{:02d}-{}.png'.format(i + 1, _slugify(figure['title'] or 'figure'))
+            tasks.append((os.path.join(report_dir, filename), figure))
+        map_tasks(_render_file, tasks, processes)
+
+        index = os.path.join(report_dir, 'index.html')
+        with open(index, 'w') as f:
+            f.write('<!DOCTYPE html>\n<title>{0}</title>\n<h1>{0}</h1>\n'.format(html.escape(self.name)))
+            for path, figure in tasks:
+                f.write('<figure><img src="{}"><figcaption>{}</figcaption></figure>\n'.format(os.path.basename(path), html.escape(figure['title'] or '')))
+        print('Report written to {}'.format(index))
+        return index
+
+    def show(self):
+        import matplotlib.pyplot as plt
+
+        for figure in self.figures:
+            _draw_figure(plt.figure(figsize=figure['size'], dpi=figure['dpi']), figure)
+        plt.show()
+
+    def finish(self):
+        """render() if ANALYSIS_REPORT (or out_dir) is set, otherwise show()."""
+        if self.out_dir:
+            return self.render()
+        self.show()
@@ -0,0 +1,50 @@
+from functools import partial
+
+import numpy as np
+from sklearn.model_selection import KFold
+
+from .instrument import instrumented
+from .pool import map_chunks
+from .suffstats import SufficientStats
+
+
+def _bootstrap_fit(seed, X, y):
+    """OLS (intercept, coef...) for one bootstrap sample, drawn with its own RandomState so the results don't depend
+    on how samples are split between workers."""
+    # Resampling rows with replacement is the same as weighting each row by how many times it was drawn
+    counts = np.bincount(np.random.RandomState(seed).randint(len(y), size=len(y)), minlength=len(y))
+    intercept, coef = SufficientStats.from_data(X, y, weights=counts).solve()
+    return np.concatenate([[intercept], coef])
+
+
+@instrumented()
+def resample_coefs(X, y, k=10, num_bootstrap=1000, seed=0, processes=None):
+    """OLS of y on X refit on each K-fold training set and on bootstrap samples, to see how stable the coefficients are.
+
+    Returns a dict with kfold (k rows), kfold_r2 (out of fold r2 for each fold) and bootstrap (num_bootstrap rows),
+    where each row is the intercept followed by the coefficients. Folds are just the total sufficient statistics
+    minus each fold's, and bootstrap refits run in worker processes, so this is cheap next to extracting X."""
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    total = SufficientStats.from_data(X, y)
+    kfold = np.empty((k, X.shape[1] + 1))
+    kfold_r2 = np.empty(k)
+    for i, (_, test) in enumerate(KFold(k, shuffle=True, random_state=seed).split(X)):
+        test_stats = SufficientStats.from_data(X[test], y[test])
+        train_stats = total - test_stats
+        intercept, coef = train_stats.solve()
+        kfold[i, 0] = intercept
+        kfold[i, 1:] = coef
+        kfold_r2[i] = test_stats.r2(intercept, coef)
+
+    seeds = np.random.RandomState(seed).randint(np.iinfo(np.int32).max, size=num_bootstrap)
+    bootstrap = np.array(map_chunks(partial(_bootstrap_fit, X=X, y=y), seeds, processes)).reshape(num_bootstrap, X.shape[1] + 1)
+
+    return {'kfold': kfold, 'kfold_r2': kfold_r2, 'bootstrap': bootstrap}
+
+
+def get_intervals(samples, level=0.95):
+    """(low, high) percentile interval for each column of some resampled fits."""
+    tail = (1 - level) / 2 * 100
+    return np.percentile(samples, tail, axis=0), np.percentile(samples, 100 - tail, axis=0)
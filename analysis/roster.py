@@ -0,0 +1,28 @@
+import numpy as np
+
+from .export_cache import get_ratings_rows
+from .instrument import instrumented
+
+
+@instrumented()
+def get_roster(tables):
+    """Every player on every team in every season, from a league export's cached tables.
+
+    Returns a dict of tid, season, ovr and pos arrays with one row per (pid, tid, season) that has stats, using
+    the player's first ratings row from that season. This is built in one vectorized pass, rather than scanning
+    every player in the league for every team-season."""
+    stats = tables['player_stats']
+    keys = np.unique(np.stack([stats['pid'], stats['tid'], stats['season']], axis=1), axis=0)
+    pid, tid, season = keys[:, 0], keys[:, 1], keys[:, 2]
+
+    ratings = tables['player_ratings']
+    rows = get_ratings_rows(ratings, pid, season, keep='first')
+    if np.any(rows < 0):
+        raise Exception("No ratings found")
+
+    return {
+        'tid': tid,
+        'season': season,
+        'ovr': ratings['ovr'][rows],
+        'pos': ratings['pos'][rows],
+    }
@@ -0,0 +1,218 @@
+import numpy as np
+
+# Rows converted to float64 at a time by from_data, so a big design matrix never gets copied all at once
+CHUNK_SIZE = 100000
+
+
+class SufficientStats:
+    """X'X, X'y, y'y and n for a linear regression with an intercept, which is all OLS or ridge needs.
+
+    Stats for different chunks of rows (like different league exports) just add up, so a fit over many files only
+    ever needs O(features^2) memory and a new file only has to contribute its own stats. With weights, these are
+    X'WX, X'Wy and y'Wy, and n is still the number of rows."""
+
+    def __init__(self, xtx, xty, yty, n):
+        self.xtx = xtx
+        self.xty = xty
+        self.yty = yty
+        self.n = n
+
+    @classmethod
+    def from_data(cls, X, y, weights=None, chunk_size=CHUNK_SIZE):
+        """Stats for a design matrix (anything np.asarray can turn into one, like a list of rows or a DataFrame),
+        accumulated chunk_size rows at a time."""
+        return cls.from_chunks(_iter_chunks(X, y, weights, chunk_size))
+
+    @classmethod
+    def from_chunks(cls, chunks):
+        """Stats for an iterable of (X, y) or (X, y, weights) chunks of rows, so the full design matrix never has to
+        exist at once."""
+        total = None
+        for chunk in chunks:
+            X, y = chunk[:2]
+            weights = chunk[2] if len(chunk) > 2 else None
+
+            X1 = np.column_stack([np.ones(len(X)), np.asarray(X, dtype=np.float64)])
+            y = np.asarray(y, dtype=np.float64)
+            wX1 = X1 if weights is None else X1 * np.asarray(weights, dtype=np.float64)[:, None]
+            stats = cls(wX1.T @ X1, wX1.T @ y, float(wX1[:, 0] @ (y * y)), len(y))
+
+            total = stats if total is None else total + stats
+
+        if total is None:
+            raise ValueError('No rows to accumulate')
+        return total
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as npz:
+            return cls(npz['xtx'], npz['xty'], float(npz['yty']), int(npz['n']))
+
+    def save(self, path):
+        np.savez(path, xtx=self.xtx, xty=self.xty, yty=self.yty, n=self.n)
+
+    def __add__(self, other):
+        return SufficientStats(self.xtx + other.xtx, self.xty + other.xty, self.yty + other.yty, self.n + other.n)
+
+    def __sub__(self, other):
+        """Stats for these rows without other's, like a cross-validation training set as the total minus a fold."""
+        return SufficientStats(self.xtx - other.xtx, self.xty - other.xty, self.yty - other.yty, self.n - other.n)
+
+    def standardize(self):
+        """Stats for the same regression with every column of X scaled to mean 0 and standard deviation 1, like
+        StandardScaler (weighted, if the stats are). Constant columns are only centered."""
+        sum_w = self.xtx[0, 0]
+        mean = self.xtx[0, 1:] / sum_w
+        std = np.sqrt(np.maximum(np.diag(self.xtx)[1:] / sum_w - mean ** 2, 0))
+        std[std == 0] = 1
+
+        # [1, X_scaled] = [1, X] @ T
+        T = np.eye(len(self.xty))
+        T[0, 1:] = -mean / std
+        T[1:, 1:] = np.diag(1 / std)
+
+        return SufficientStats(T.T @ self.xtx @ T, T.T @ self.xty, self.yty, self.n)
+
+    def centered(self):
+        """(gram, Xy, X_offset, y_offset): X'X and X'y after subtracting the (weighted) column means from X and y,
+        plus those means. The intercept is y_offset - X_offset @ coef for any coef fit on the centered data."""
+        sum_w = self.xtx[0, 0]
+        X_offset = self.xtx[0, 1:] / sum_w
+        y_offset = self.xty[0] / sum_w
+        gram = self.xtx[1:, 1:] - sum_w * np.outer(X_offset, X_offset)
+        Xy = self.xty[1:] - X_offset * self.xty[0]
+        return gram, Xy, X_offset, y_offset
+
+    def solve(self, ridge=0):
+        """(intercept, coef) minimizing squared error plus ridge * |coef|^2. The intercept is not penalized.
+
+        This is solved on centered data, so a constant column (like a depth slot nobody fills) just gets a 0
+        coefficient, the minimum norm solution, same as LinearRegression."""
+        gram, Xy, X_offset, y_offset = self.centered()
+        coef = np.linalg.lstsq(gram + ridge * np.eye(len(Xy)), Xy, rcond=None)[0]
+        return y_offset - X_offset @ coef, coef
+
+    def sse(self, intercept, coef):
+        beta = np.concatenate([[intercept], coef])
+        return self.yty - 2 * beta @ self.xty + beta @ self.xtx @ beta
+
+    def r2(self, intercept, coef):
+        sst = self.yty - self.xty[0] ** 2 / self.xtx[0, 0]
+        return 1 - self.sse(intercept, coef) / sst
+
+    def fit(self, ridge=0, names=None):
+        """solve plus standard errors, t statistics and p-values, as a LinearFit.
+
+        For ridge > 0 the standard errors are the usual sandwich estimate for a fixed penalty, which makes the
+        p-values rough at best."""
+        # pinv rather than solve, so a constant or duplicated column gets the minimum norm solution like statsmodels
+        # instead of an error
+        inv = np.linalg.pinv(self._penalized_xtx(ridge))
+        beta = inv @ self.xty
+        intercept, coef = beta[0], beta[1:]
+        num_params = len(beta)
+        df_resid = self.n - num_params
+
+        sigma2 = self.sse(intercept, coef) / df_resid
+        cov = sigma2 * (inv if ridge == 0 else inv @ self.xtx @ inv)
+        bse = np.sqrt(np.maximum(np.diag(cov), 0))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tvalues = beta / bse
+        # scipy.stats takes about a second to import, so only pay for it when p-values are actually wanted
+        from scipy import stats as scipy_stats
+
+        pvalues = 2 * scipy_stats.t.sf(np.abs(tvalues), df_resid)
+
+        if names is None:
+            names = ['x' + str(i + 1) for i in range(num_params - 1)]
+
+        return LinearFit(['const'] + list(names), beta, bse, tvalues, pvalues, self.r2(intercept, coef), self.n, df_resid)
+
+    def _penalized_xtx(self, ridge):
+        if ridge == 0:
+            return self.xtx
+        penalty = ridge * np.eye(len(self.xty))
+        penalty[0, 0] = 0
+        return self.xtx + penalty
+
+
+class LinearFit:
+    """Coefficients of a SufficientStats fit with their standard errors, t statistics and p-values. Everything is
+    ordered like names, which starts with 'const' for the intercept."""
+
+    def __init__(self, names, params, bse, tvalues, pvalues, r2, n, df_resid):
+        self.names = names
+        self.params = params
+        self.bse = bse
+        self.tvalues = tvalues
+        self.pvalues = pvalues
+        self.r2 = r2
+        self.n = n
+        self.df_resid = df_resid
+
+    @property
+    def intercept(self):
+        return self.params[0]
+
+    @property
+    def coef(self):
+        return self.params[1:]
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def summary(self):
+        """A coefficient table like the top of statsmodels' OLS summary."""
+        width = max(len(name) for name in self.names)
+        lines = [
+            'R-squared: {:.3f}    No. Observations: {}    Df Residuals: {}'.format(self.r2, self.n, self.df_resid),
+            '{:<{}} {:>10} {:>10} {:>8} {:>8}'.format('', width, 'coef', 'std err', 't', 'P>|t|'),
+        ]
+        for row in zip(self.names, self.params, self.bse, self.tvalues, self.pvalues):
+            lines.append('{:<{}} {:>10.4f} {:>10.4f} {:>8.3f} {:>8.3f}'.format(row[0], width, *row[1:]))
+        return '\n'.join(lines)
+
+
+def solve_groups(X, y, group, num_groups):
+    """Separate OLS fits of y on X (plus an intercept) within each group of rows, all accumulated and solved at once.
+
+    group is each row's group number, from 0 to num_groups - 1. X'X, X'y and y'y for every group come from one
+    bincount per entry, and the per-group systems are solved as one stack, so there's no subsetting of rows per
+    group. Returns (intercepts, coefs, r2), with one entry or row per group."""
+    X1 = np.column_stack([np.ones(len(X)), np.asarray(X, dtype=np.float64)])
+    y = np.asarray(y, dtype=np.float64)
+    num_cols = X1.shape[1]
+
+    xtx = np.empty((num_groups, num_cols, num_cols))
+    xty = np.empty((num_groups, num_cols))
+    for i in range(num_cols):
+        xty[:, i] = np.bincount(group, weights=X1[:, i] * y, minlength=num_groups)
+        for j in range(i, num_cols):
+            xtx[:, i, j] = xtx[:, j, i] = np.bincount(group, weights=X1[:, i] * X1[:, j], minlength=num_groups)
+    yty = np.bincount(group, weights=y * y, minlength=num_groups)
+
+    # Same as SufficientStats.centered and solve, for every group at once
+    sum_w = xtx[:, 0, 0]
+    X_offset = xtx[:, 0, 1:] / sum_w[:, None]
+    y_offset = xty[:, 0] / sum_w
+    gram = xtx[:, 1:, 1:] - sum_w[:, None, None] * X_offset[:, :, None] * X_offset[:, None, :]
+    Xy = xty[:, 1:] - X_offset * xty[:, :1]
+    # An empty group's gram is all nan, which pinv can't handle, so it gets zeros instead and comes out as a nan fit
+    gram = np.where(sum_w[:, None, None] > 0, gram, 0)
+    coefs = (np.linalg.pinv(gram) @ Xy[:, :, None])[:, :, 0]
+    intercepts = y_offset - np.sum(X_offset * coefs, axis=1)
+
+    beta = np.column_stack([intercepts, coefs])
+    sse = yty - 2 * np.sum(beta * xty, axis=1) + np.einsum('gi,gij,gj->g', beta, xtx, beta)
+    sst = yty - xty[:, 0] ** 2 / sum_w
+
+    return intercepts, coefs, 1 - sse / sst
+
+
+def _iter_chunks(X, y, weights, chunk_size):
+    # Always at least one chunk, so no rows gives all zero stats of the right shape
+    for start in range(0, max(len(y), 1), chunk_size):
+        end = start + chunk_size
+        X_chunk = X.iloc[start:end] if hasattr(X, 'iloc') else X[start:end]
+        yield X_chunk, y[start:end], None if weights is None else weights[start:end]
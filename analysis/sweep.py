@@ -0,0 +1,71 @@
+import itertools
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from .instrument import instrumented
+from .pool import map_chunks
+from .suffstats import solve_groups
+
+
+def get_settings(grid):
+    """Every combination of the values in grid, a dict of parameter name to list of values, as a list of dicts."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def _fit_setting(setting, X, y, group, num_groups, where, filter_cols):
+    """Intercepts, coefs, r2 and n for each group under one setting's filter."""
+    mask = np.broadcast_to(eval(where, {'np': np}, dict(filter_cols, **setting)), y.shape)
+
+    # Filtered out rows go in an extra group that's thrown away, so the full arrays never get copied
+    masked_group = np.where(mask, group, num_groups)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        intercepts, coefs, r2 = solve_groups(X, y, masked_group, num_groups + 1)
+    n = np.bincount(masked_group, minlength=num_groups + 1)
+    return intercepts[:num_groups], coefs[:num_groups], r2[:num_groups], n[:num_groups]
+
+
+@instrumented()
+def sweep(columns, x_cols, y_col, where, grid, group=None, labels=None, processes=None):
+    """OLS of y_col on x_cols over the rows matching where, for every combination of parameter values in grid.
+
+    columns is anything with a column per name, like a dict of arrays or a DataFrame, loaded once without any of the
+    filters being swept. where is a Python expression over column names and grid parameters that gives a boolean
+    mask, like 'MP * G > min_minutes' with grid={'min_minutes': [500, 820, 1200]}. With group (each row's index into
+    labels, negative to skip the row), there's a separate fit per group, like fit_groups.
+
+    Settings run in worker processes with map_chunks, so X and y are sent once per worker, not per setting. Returns a
+    DataFrame with a row per setting (and group): the grid parameters, group if given, then Intercept, x_cols, r2
+    and n, like the fit_groups table."""
+    X = np.column_stack([np.asarray(columns[col], dtype=np.float64) for col in x_cols])
+    y = np.asarray(columns[y_col], dtype=np.float64)
+    if group is None:
+        group = np.zeros(len(y), dtype=np.int64)
+        num_groups = 1
+    else:
+        num_groups = len(labels)
+        group = np.where(np.asarray(group) < 0, num_groups, group)
+
+    # Only the columns where actually uses get sent to the workers
+    names = compile(where, '<where>', 'eval').co_names
+    filter_cols = {name: np.asarray(columns[name]) for name in names if name not in grid and name in columns}
+
+    settings = get_settings(grid)
+    func = partial(_fit_setting, X=X, y=y, group=group, num_groups=num_groups, where=where, filter_cols=filter_cols)
+    results = map_chunks(func, settings, processes)
+
+    rows = []
+    for setting, (intercepts, coefs, r2, n) in zip(settings, results):
+        for i in range(num_groups):
+            row = dict(setting)
+            if labels is not None:
+                row['group'] = labels[i]
+            row['Intercept'] = intercepts[i]
+            row.update(zip(x_cols, coefs[i]))
+            row['r2'] = r2[i]
+            row['n'] = n[i]
+            rows.append(row)
+
+    return pd.DataFrame(rows, columns=list(grid) + (['group'] if labels is not None else []) + ['Intercept'] + list(x_cols) + ['r2', 'n'])
@@ -0,0 +1,118 @@
+import json
+import random
+
+# Just enough of each sport for the analysis scripts: positions and the rating keys a ratings row has
+SPORTS = {
+    'basketball': {
+        'positions': ['PG', 'SG', 'SF', 'PF', 'C', 'G', 'F', 'GF', 'FC'],
+        'ratings': ['hgt', 'stre', 'spd', 'jmp', 'endu', 'ins', 'dnk', 'ft', 'fg', 'tp', 'oiq', 'diq', 'drb', 'pss', 'reb'],
+        'minutes': 240,
+    },
+    'football': {
+        'positions': ['QB', 'RB', 'WR', 'TE', 'OL', 'DL', 'LB', 'CB', 'S', 'K', 'P'],
+        'ratings': ['hgt', 'stre', 'spd', 'endu', 'thv', 'thp', 'tha', 'bsc', 'elu', 'rtr', 'hnd', 'rbk', 'pbk', 'pcv', 'tck', 'prs', 'rns', 'kpw', 'kac', 'ppw', 'pac'],
+        'minutes': 60 * 22,
+    },
+    'hockey': {
+        'positions': ['C', 'W', 'D', 'G'],
+        'ratings': ['hgt', 'stre', 'spd', 'endu', 'pss', 'wst', 'sst', 'stk', 'oiq', 'chk', 'blk', 'fcf', 'diq', 'glk'],
+        'minutes': 60 * 6,
+    },
+}
+
+
+def make_export(sport, num_seasons=10, num_teams=30, players_per_team=15, games_per_season=0, seed=0, start_season=2000):
+    """A fake league export shaped like the real ones for a sport, with made up but self-consistent data.
+
+    It has players (ratings, stats, statsTids, value, contract), teams (stats) and, if games_per_season > 0, games with box scores.
+    Team results depend on roster ovr, so the regressions have something to find."""
+    rng = random.Random(seed)
+    spec = SPORTS[sport]
+
+    players = []
+    rosters = [[] for _ in range(num_teams)]
+
+    def new_player():
+        p = {
+            'pid': len(players),
+            'tid': -1,
+            'ratings': [],
+            'stats': [],
+            'statsTids': [],
+            'pos': rng.choice(spec['positions']),
+            'base': rng.gauss(50, 10),
+        }
+        players.append(p)
+        return p
+
+    teams = [{'tid': tid, 'stats': []} for tid in range(num_teams)]
+    games = []
+
+    for i in range(num_seasons):
+        season = start_season + i
+
+        for tid, roster in enumerate(rosters):
+            roster[:] = [p for p in roster if rng.random() > 0.15]
+            while len(roster) < players_per_team:
+                roster.append(new_player())
+
+            for p in roster:
+                p['tid'] = tid
+                ovr = max(0, min(100, int(round(p['base'] + rng.gauss(0, 3)))))
+                r = {k: max(0, min(100, int(round(ovr + rng.gauss(0, 15))))) for k in spec['ratings']}
+                r.update({'season': season, 'pos': p['pos'], 'ovr': ovr, 'pot': max(ovr, int(round(ovr + rng.gauss(5, 5)))), 'fuzz': rng.gauss(0, 2), 'skills': []})
+                p['ratings'].append(r)
+                if tid not in p['statsTids']:
+                    p['statsTids'].append(tid)
+
+        team_ovrs = [sum(sorted((p['ratings'][-1]['ovr'] for p in roster), reverse=True)[:10]) / 10 for roster in rosters]
+        gp = max(1, 2 * games_per_season // num_teams) if games_per_season > 0 else 82
+        for tid, t in enumerate(teams):
+            pts = int(round(gp * (100 + (team_ovrs[tid] - 50) + rng.gauss(0, 3))))
+            opp_pts = int(round(gp * (100 + rng.gauss(0, 3))))
+            t['stats'].append({'season': season, 'playoffs': False, 'gp': gp, 'pts': pts, 'oppPts': opp_pts})
+
+        for _ in range(games_per_season):
+            tids = rng.sample(range(num_teams), 2)
+            box = []
+            for tid in tids:
+                box_players = []
+                for p in rosters[tid]:
+                    mins = rng.choice([0, rng.uniform(0, spec['minutes'] / players_per_team * 2)])
+                    box_players.append({'pid': p['pid'], 'pos': p['pos'], 'min': mins})
+                box.append({'tid': tid, 'pts': int(round(team_ovrs[tid] / 2 + rng.gauss(0, 8))), 'players': box_players})
+            won, lost = (box[0], box[1]) if box[0]['pts'] >= box[1]['pts'] else (box[1], box[0])
+            games.append({
+                'gid': len(games),
+                'season': season,
+                'teams': box,
+                'won': {'tid': won['tid'], 'pts': won['pts']},
+                'lost': {'tid': lost['tid'], 'pts': lost['pts']},
+            })
+
+        for roster in rosters:
+            for p in roster:
+                mins = rng.uniform(0, spec['minutes'] * 10)
+                p['stats'].append({'season': season, 'tid': p['tid'], 'playoffs': False, 'gp': gp, 'min': mins, 'av': rng.randint(0, 12), 'pts': rng.randint(0, 500)})
+
+    for p in players:
+        # Player value and contract, for player-value-vs-contract-amount, with better players paid more
+        p['value'] = p['ratings'][-1]['ovr'] + rng.gauss(0, 3)
+        p['contract'] = {'amount': max(750, int(round(1000 + 200 * (p['value'] - 40) + rng.gauss(0, 1000)))), 'exp': start_season + num_seasons + rng.randint(0, 4)}
+        del p['base']
+        del p['pos']
+
+    return {
+        'version': 50,
+        'meta': {'name': 'Synthetic {} league'.format(sport)},
+        'gameAttributes': {'startingSeason': start_season},
+        'players': players,
+        'teams': teams,
+        'games': games,
+    }
+
+
+def write_export(path, sport, **kwargs):
+    """make_export, saved to a file with a BOM so the utf-8-sig handling gets exercised too."""
+    with open(path, 'w', encoding='utf-8-sig') as f:
+        json.dump(make_export(sport, **kwargs), f)
@@ -1,110 +1,41 @@
-import json
-import matplotlib.pyplot as plt  
+import os
+import sys
 import pandas as pd
-import numpy as np
-import scipy.optimize as opt
 
-from sklearn.linear_model import LinearRegression
 from sklearn.metrics import r2_score
 
-def get_cols():
-    cols = {
-        "ovr0": [],
-        "ovr1": [],
-        "ovr2": [],
-        "ovr3": [],
-        "ovr4": [],
-        "ovr5": [],
-        "ovr6": [],
-        "ovr7": [],
-        "ovr8": [],
-        "ovr9": [],
-        "mov": [],
-    }
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from analysis.exp_decay import fit_exp_decay
+from analysis.regression import fit_linear, print_coef_intervals
+from analysis.report import Report, curves, density
+from analysis.suffstats import SufficientStats
+from analysis.team_ovr import DEPTH, FIT_COLS, get_cols
 
-    with open("data-playoffs.json", "r", encoding='utf-8-sig') as read_file:
-        data = json.load(read_file)
-
-    def get_ovrs(tid, season):
-        ovrs = []
-
-        for p in data['players']:
-            if tid in p['statsTids']:
-                for ps in p['stats']:
-                    if ps['season'] == season and ps['tid'] == tid:
-                        found_ratings = False
-                        for pr in p['ratings']:
-                            if pr['season'] == season:
-                                found_ratings = True
-                                ovrs.append(pr['ovr'])
-                                break
-                        if not found_ratings:
-                            raise Exception("No ratings found")
-                        break
-                    elif ps['season'] > season:
-                        break
-
-        ovrs.sort(reverse=True)
-
-        return ovrs
-
-    for t in data['teams']:
-        tid = t['tid']
-        for ts in t['stats']:
-            if not ts['playoffs'] and ts['gp'] > 0:
-                season = ts['season']
-                mov = (ts['pts'] - ts['oppPts']) / ts['gp'];
-                cols['mov'].append(mov)
-
-                ovrs = get_ovrs(tid, season)
-                cols['ovr0'].append(ovrs[0])
-                cols['ovr1'].append(ovrs[1])
-                cols['ovr2'].append(ovrs[2])
-                cols['ovr3'].append(ovrs[3])
-                cols['ovr4'].append(ovrs[4])
-                cols['ovr5'].append(ovrs[5])
-                cols['ovr6'].append(ovrs[6])
-                cols['ovr7'].append(ovrs[7])
-                cols['ovr8'].append(ovrs[8])
-                cols['ovr9'].append(ovrs[9])
-
-    return cols
-
-cols = get_cols()
+cols = get_cols(["data-playoffs.json"], DEPTH['basketball'])
 
 dataset = pd.DataFrame(cols)
 
-reg = LinearRegression(normalize=True)
-fit_cols = ['ovr0', 'ovr1', 'ovr2', 'ovr3', 'ovr4', 'ovr5', 'ovr6', 'ovr7', 'ovr8', 'ovr9']
-reg.fit(dataset[fit_cols], dataset['mov'])
+fit_cols = FIT_COLS['basketball']
+reg = fit_linear(dataset, fit_cols, 'mov', normalize=True)
 dataset['mov_predicted'] = reg.predict(dataset[fit_cols])
 
-print('Intercept: \n', reg.intercept_)
-print('Coefficients: \n', reg.coef_)
 print('r2: ', r2_score(dataset['mov'], dataset['mov_predicted']))
 
-print(dataset)
+# How much the coefficients move around when refit on resampled team seasons. That's 1000 bootstrap refits, so only
+# with ANALYSIS_INTERVALS=1, like --intervals for python -m analysis team-ovr
+if os.environ.get('ANALYSIS_INTERVALS') == '1':
+    print_coef_intervals(dataset, fit_cols, 'mov')
 
+print(dataset)
 
-# dataset.plot.hexbin(x='mov', y='mov_predicted', gridsize=20)
-dataset.plot.scatter(x='mov', y='mov_predicted', alpha=0.2)
-plt.xlabel('Actual MOV')  
-plt.ylabel('Predicted MOV')  
 
-plt.plot([-20, 20], [-20, 20])
+report = Report('team-ovr-basketball')
+report.add('Team ovr', density(dataset['mov'], dataset['mov_predicted'], bins=40, xlabel='Actual MOV', ylabel='Predicted MOV', lines=[([-20, 20], [-20, 20])]))
 
-# find exp fit
-def best_fit_func_exp(x):
-    return np.linalg.norm(( dataset[fit_cols] @ np.exp(x[0]*np.arange(10))*x[1]-x[2] - dataset['mov']))
-a,b = np.polyfit(np.arange(10),np.log(np.array(reg.coef_)),1)
-res2 = opt.minimize(best_fit_func_exp,[a,np.exp(b),-125],method='Nelder-Mead')
-result_str = '{:.4f} e^{{ {:.4f} x }}  + {:.2f}'.format(res2.x[1],res2.x[0],res2.x[2])
+# find exp fit, with the scale and offset solved exactly for each decay rate tried
+exp_fit = fit_exp_decay(SufficientStats.from_data(dataset[fit_cols], dataset['mov']), DEPTH['basketball'])
+result_str = '{:.4f} e^{{ {:.4f} x }}  + {:.2f}'.format(exp_fit.scales[0],exp_fit.rates[0],exp_fit.intercept)
 print('exp fit:\t',result_str)
-plt.figure()
-plt.plot(np.array(reg.coef_),label='regressed')
-plt.plot(np.exp(res2.x[0]*np.arange(10))*res2.x[1],label='best-fit exp model',alpha=0.6)
-plt.rc('text', usetex=True)
-plt.title(result_str)
-plt.legend()
+report.add('Exp fit', curves({'regressed': reg.coef_, 'best-fit exp model': exp_fit.coef}, title='$' + result_str + '$'))
 
-plt.show()
+report.finish()
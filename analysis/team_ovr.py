@@ -0,0 +1,127 @@
+from functools import partial
+
+import numpy as np
+
+from .export_cache import find_rows, load_tables
+from .incremental import fit_files, get_cached_features
+from .instrument import instrumented
+from .pool import map_files
+from .roster import get_roster
+
+# Roster slots used as features in each sport's team ovr regression, as position: number of players, in column
+# order. None means any position, for basketball where it's just the best players on the team. Adding a slot is
+# just bumping a number here.
+DEPTH = {
+    'basketball': {None: 10},
+    'football': {'QB': 1, 'RB': 1, 'TE': 1, 'WR': 3, 'OL': 5, 'CB': 2, 'S': 2, 'LB': 3, 'DL': 4, 'K': 1, 'P': 1},
+    'hockey': {'C': 4, 'W': 8, 'D': 6, 'G': 2},
+}
+
+# Used when a team doesn't have enough players at a position to fill every slot
+DEFAULT_OVR = 20
+
+# Bump this whenever get_slot_cols or get_roster changes, so cached per-file columns from the old version are ignored
+FILE_COLS_KEY = 'team_ovr.get_file_cols v1'
+
+
+def get_slot_name(pos, i):
+    if pos is None:
+        return 'ovr' + str(i)
+    return pos + str(i + 1)
+
+
+def get_slot_names(depth):
+    """Column names for every slot in a depth spec, like QB1, WR1, WR2, WR3 or ovr0, ovr1, ..."""
+    return [get_slot_name(pos, i) for pos, num_players in depth.items() for i in range(num_players)]
+
+
+# Columns each sport's team ovr regression is fit on, in column order. Usually every slot in DEPTH, but football
+# leaves out LB3.
+FIT_COLS = {
+    'basketball': get_slot_names(DEPTH['basketball']),
+    'football': ['QB1', 'RB1', 'TE1', 'WR1', 'WR2', 'WR3', 'OL1', 'OL2', 'OL3', 'OL4', 'OL5', 'CB1', 'CB2', 'S1', 'S2', 'LB1', 'LB2', 'DL1', 'DL2', 'DL3', 'DL4', 'K1', 'P1'],
+    'hockey': get_slot_names(DEPTH['hockey']),
+}
+
+
+def get_top_k(group, values, num_groups, k, default):
+    """The k highest values in each group, best first, as a (num_groups, k) array padded with default."""
+    order = np.argsort(group, kind='stable')
+    group = group[order]
+    values = values[order]
+
+    # Lay each group out in its own row of a dense array, so one partition call handles every group at once
+    counts = np.bincount(group, minlength=num_groups)
+    starts = np.cumsum(counts) - counts
+    width = max(k, counts.max() if len(counts) > 0 else 0)
+    dense = np.full((num_groups, width), np.inf)
+    dense[group, np.arange(len(group)) - starts[group]] = -values.astype(np.float64)
+
+    top = -np.sort(np.partition(dense, k - 1, axis=1)[:, :k], axis=1)
+    top[np.isinf(top)] = default
+    return top
+
+
+@instrumented()
+def get_slot_cols(tables, depth, default_ovr=DEFAULT_OVR):
+    """Slot ovrs and mov for every regular season team-season with games played, as a dict of column name to array."""
+    team_stats = tables['team_stats']
+    regular_season = ~team_stats['playoffs'].astype(bool) & (team_stats['gp'] > 0)
+    tid = team_stats['tid'][regular_season]
+    season = team_stats['season'][regular_season]
+    num_team_seasons = len(tid)
+
+    cols = {}
+
+    roster = get_roster(tables)
+    group = find_rows([tid, season], [roster['tid'], roster['season']], keep='first')
+    on_team = group >= 0
+
+    for pos, num_players in depth.items():
+        mask = on_team if pos is None else on_team & (roster['pos'] == pos)
+        top = get_top_k(group[mask], roster['ovr'][mask], num_team_seasons, num_players, default_ovr)
+        for i in range(num_players):
+            cols[get_slot_name(pos, i)] = top[:, i]
+
+    cols['mov'] = (team_stats['pts'][regular_season] - team_stats['oppPts'][regular_season]) / team_stats['gp'][regular_season]
+
+    return cols
+
+
+def get_file_cols(file, depth, default_ovr=DEFAULT_OVR):
+    """get_slot_cols for one league export, split out so it can run in a worker process."""
+    return get_slot_cols(load_tables(file), depth, default_ovr)
+
+
+def _get_extract(depth, default_ovr):
+    extract = partial(get_file_cols, depth=depth, default_ovr=default_ovr)
+    key = FILE_COLS_KEY + repr((depth, default_ovr))
+    return extract, key
+
+
+def get_cols(files, depth, default_ovr=DEFAULT_OVR):
+    """Slot ovrs and mov for every team-season in some league exports, as a dict of column name to array.
+
+    Files are processed in parallel, rows come out in sorted file order, and each file's columns are cached on disk
+    so only new or changed files get extracted again."""
+    extract, key = _get_extract(depth, default_ovr)
+    results = map_files(partial(get_cached_features, extract=extract, key=key), files)
+    for file in sorted(files):
+        print(file)
+
+    names = get_slot_names(depth) + ['mov']
+    return {name: np.concatenate([result[name] for result in results]) for name in names}
+
+
+def get_team_ovr_stats(files, depth, fit_cols, default_ovr=DEFAULT_OVR):
+    """SufficientStats of mov on fit_cols over every file, summed from per-file stats cached on disk, so adding one
+    more export to a directory only extracts and summarizes that file."""
+    extract, key = _get_extract(depth, default_ovr)
+    return fit_files(files, extract, key, fit_cols, 'mov')
+
+
+def fit_team_ovr(files, depth, fit_cols, default_ovr=DEFAULT_OVR):
+    """(intercept, coef, r2) of an OLS of mov on fit_cols over every file, solved from get_team_ovr_stats."""
+    stats = get_team_ovr_stats(files, depth, fit_cols, default_ovr)
+    intercept, coef = stats.solve()
+    return intercept, coef, stats.r2(intercept, coef)
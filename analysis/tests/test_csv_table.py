@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis import csv_table
+from analysis.csv_table import RATING, read_csv_table
+
+DTYPE = {'Age': RATING, 'Ovr': RATING, 'Pot': 'float64', 'Pos': str}
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    rng = np.random.RandomState(0)
+    df = pd.DataFrame({
+        'Name': ['Player {}'.format(i) for i in range(50)],
+        'Pos': rng.choice(['C', 'PF', 'SG'], 50),
+        'Age': rng.randint(19, 35, 50),
+        'Ovr': rng.randint(30, 80, 50),
+        'Pot': rng.uniform(30, 80, 50).round(1),
+        'Extra': rng.rand(50),
+    })
+    path = tmp_path / 'data.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def _check(dataset, expected):
+    assert list(dataset.columns) == list(DTYPE)
+    assert dataset.index.tolist() == expected.index.tolist()
+    for col, t in DTYPE.items():
+        assert dataset[col].tolist() == expected[col].tolist()
+        if t is not str:
+            assert dataset[col].dtype == np.dtype(t)
+
+
+@pytest.mark.parametrize('chunksize', [1, 7, 1000])
+def test_matches_read_csv(csv_path, chunksize):
+    expected = pd.read_csv(csv_path)
+    expected = expected[expected['Age'] <= 28]
+
+    _check(read_csv_table(csv_path, DTYPE, where='Age <= 28', cache=False, chunksize=chunksize), expected)
+
+
+def test_cache(csv_path, monkeypatch):
+    expected = pd.read_csv(csv_path)
+    expected = expected[expected['Age'] * expected['Ovr'] > 1500]
+
+    _check(read_csv_table(csv_path, DTYPE, where='Age * Ovr > 1500'), expected)
+
+    # The second read has to come from the cache, without parsing the CSV again
+    def fail(*args, **kwargs):
+        raise AssertionError('parsed the CSV again')
+
+    monkeypatch.setattr(csv_table.pd, 'read_csv', fail)
+    _check(read_csv_table(csv_path, DTYPE, where='Age * Ovr > 1500'), expected)
+
+    # A different filter or file contents is a different cache entry
+    with pytest.raises(AssertionError):
+        read_csv_table(csv_path, DTYPE, where='Age <= 28')
+    with open(csv_path, 'a') as f:
+        f.write('Player 50,C,20,60,70.5,0.5\n')
+    with pytest.raises(AssertionError):
+        read_csv_table(csv_path, DTYPE, where='Age * Ovr > 1500')
+
+
+def test_nothing_matches(csv_path):
+    dataset = read_csv_table(csv_path, DTYPE, where='Age > 100')
+
+    assert len(dataset) == 0
+    assert list(dataset.columns) == list(DTYPE)
+    assert dataset['Age'].dtype == np.dtype(RATING)
+    assert len(read_csv_table(csv_path, DTYPE, where='Age > 100')) == 0
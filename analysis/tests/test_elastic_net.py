@@ -0,0 +1,75 @@
+import warnings
+
+import numpy as np
+import pytest
+from sklearn.linear_model import ElasticNetCV
+from sklearn.utils.validation import check_is_fitted
+
+from analysis.elastic_net import fit_elastic_net_cv
+
+L1_RATIOS = [.1, .5, .9, 1]
+
+
+def _make_data(num_rows=600, num_cols=12, seed=0):
+    rng = np.random.RandomState(seed)
+    X = rng.randn(num_rows, num_cols).astype(np.float32)
+    # A column that's always 0, like a rating a position never uses
+    X[:, 3] = 0
+    y = X[:, :6] @ rng.rand(6) * 2 + rng.randn(num_rows) * 3
+    return X, y
+
+
+def _fit_sklearn(X, y, alphas, **kwargs):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        if alphas is None:
+            reg = ElasticNetCV(l1_ratio=L1_RATIOS, **kwargs)
+        else:
+            reg = ElasticNetCV(l1_ratio=L1_RATIOS, alphas=alphas, **kwargs)
+        return reg.fit(np.asarray(X, dtype=np.float64), y)
+
+
+# Newer sklearn only uses positive coefficients for the default alpha grid with positive=True, so that one gets an
+# explicit grid
+@pytest.mark.parametrize('positive,alphas', [(False, None), (True, np.logspace(-3, 0, 20))])
+@pytest.mark.parametrize('processes', [1, 2])
+def test_matches_elastic_net_cv(positive, alphas, processes):
+    X, y = _make_data()
+    kwargs = {'cv': 5, 'positive': positive, 'max_iter': 10000}
+
+    reg = fit_elastic_net_cv(X, y, L1_RATIOS, alphas=alphas, processes=processes, **kwargs)
+    expected = _fit_sklearn(X, y, alphas, **kwargs)
+
+    assert reg.l1_ratio_ == expected.l1_ratio_
+    assert reg.alpha_ == pytest.approx(expected.alpha_, rel=1e-10)
+    np.testing.assert_allclose(reg.alphas_, expected.alphas_, rtol=1e-10)
+    np.testing.assert_allclose(reg.mse_path_, expected.mse_path_, rtol=1e-8)
+    np.testing.assert_allclose(reg.coef_, expected.coef_, atol=1e-8)
+    assert reg.intercept_ == pytest.approx(expected.intercept_, abs=1e-8)
+    assert reg.score(X, y) == pytest.approx(expected.score(X, y), abs=1e-10)
+
+
+def test_memmap(tmp_path):
+    X, y = _make_data(num_rows=101)
+    X_map = np.memmap(tmp_path / 'X.f32', dtype=np.float32, mode='w+', shape=X.shape)
+    X_map[:] = X
+    X_map.flush()
+
+    reg = fit_elastic_net_cv(X_map, y, .5, cv=3, processes=1)
+    expected = fit_elastic_net_cv(X, y, .5, cv=3, processes=1)
+    np.testing.assert_allclose(reg.mse_path_, expected.mse_path_)
+    np.testing.assert_allclose(reg.coef_, expected.coef_)
+
+
+def test_returned_model_predicts():
+    X, y = _make_data()
+    reg = fit_elastic_net_cv(X, y, L1_RATIOS, cv=3, positive=True, processes=1)
+
+    # Older sklearn (like the pinned 0.21) checks for n_iter_ before predicting, so every fit attribute has to be set
+    check_is_fitted(reg, ['coef_', 'intercept_', 'n_iter_', 'dual_gap_'])
+    assert reg.n_iter_ > 0
+
+    predicted = reg.predict(X)
+    np.testing.assert_allclose(predicted, X.astype(np.float64) @ reg.coef_ + reg.intercept_, rtol=1e-6)
+    residual = y - predicted
+    assert reg.score(X, y) == pytest.approx(1 - residual @ residual / np.sum((y - y.mean()) ** 2), rel=1e-6)
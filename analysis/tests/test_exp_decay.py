@@ -0,0 +1,56 @@
+import numpy as np
+import scipy.optimize as opt
+
+from analysis.exp_decay import RATE_BOUNDS, fit_exp_decay
+from analysis.suffstats import SufficientStats
+from analysis.team_ovr import DEPTH
+
+
+def _make_data(weights, num_rows=2000, seed=0):
+    rng = np.random.RandomState(seed)
+    # Depth charts are sorted, so each row's ovrs go down from slot to slot
+    X = -np.sort(-rng.normal(50, 10, (num_rows, len(weights))), axis=1)
+    y = X @ weights - 120 + rng.randn(num_rows) * 5
+    return X, y
+
+
+def test_matches_old_basketball_fit():
+    X, y = _make_data(0.16 * np.exp(-0.25 * np.arange(10)))
+    stats = SufficientStats.from_data(X, y)
+
+    # What team-ovr-basketball used to do: Nelder-Mead on every parameter of a e^{b x} + c. It started from a line
+    # fit to the log of the OLS coefficients, but with this much noise some of those are negative
+    def old_sse(x):
+        return np.sum((X @ (np.exp(x[0] * np.arange(10)) * x[1]) - x[2] - y) ** 2)
+
+    res = opt.minimize(old_sse, [-0.2, 0.1, 100], method='Nelder-Mead', options={'xatol': 1e-10, 'fatol': 1e-10, 'maxiter': 100000, 'maxfev': 100000})
+    rate, scale, neg_intercept = res.x
+
+    fit = fit_exp_decay(stats, DEPTH['basketball'])
+
+    np.testing.assert_allclose(fit.rates, [rate], rtol=1e-4)
+    np.testing.assert_allclose(fit.scales, [scale], rtol=1e-4)
+    np.testing.assert_allclose(fit.intercept, -neg_intercept, rtol=1e-4)
+    assert np.sum((fit.predict(X) - y) ** 2) <= res.fun * (1 + 1e-9)
+
+
+def test_single_slot_rates_fixed():
+    depth = {'QB': 1, 'WR': 3, 'K': 1}
+    X, y = _make_data(np.array([0.5, 0.3, 0.2, 0.1, 0.05]))
+
+    fit = fit_exp_decay(SufficientStats.from_data(X, y), depth)
+
+    assert fit.rates[0] == 0 and fit.rates[2] == 0
+    assert fit.rates[1] < 0
+    np.testing.assert_allclose(fit.coef[[0, 4]], fit.scales[[0, 2]])
+    assert fit.summary().splitlines()[0] == 'QB: {:.4f}'.format(fit.scales[0])
+
+
+def test_rates_bounded():
+    # Weights that grow down the depth chart would fit a positive rate, which can blow up over 8 slots
+    X, y = _make_data(0.05 * np.exp(0.3 * np.arange(8)))
+
+    fit = fit_exp_decay(SufficientStats.from_data(X, y), {'W': 8})
+
+    assert RATE_BOUNDS[0] <= fit.rates[0] <= RATE_BOUNDS[1]
+    assert np.all(np.isfinite(fit.coef))
@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from analysis.export_cache import load_tables
+from analysis.game_features import get_position_features
+from analysis.synthetic import make_export
+
+
+def _old_features(data, rating_cols, positions):
+    """X and y the way low-ovr-good-team-football used to build them: a DataFrame groupby per team per game, with a
+    1e-9 minute dummy row at every position."""
+    player_ratings = {}
+    for p in data['players']:
+        for r in p['ratings']:
+            player_ratings[(p['pid'], r['season'])] = {k: v for k, v in r.items() if type(v) == int and k != 'season'}
+
+    X = []
+    y = []
+    for g in data['games']:
+        season = g['season']
+        if g['won']['tid'] == g['teams'][0]['tid']:
+            y.append(g['won']['pts'] - g['lost']['pts'])
+        else:
+            y.append(g['lost']['pts'] - g['won']['pts'])
+
+        rows = []
+        for i in range(2):
+            team_r = []
+            for p in g['teams'][i]['players']:
+                r = {k: p['min'] * v for k, v in player_ratings[(p['pid'], season)].items()}
+                r['pos'] = p['pos']
+                r['min'] = p['min']
+                if p['min'] > 0:
+                    team_r.append(r)
+            for pos in positions:
+                r = {k: 0 for k in r}
+                r['pos'] = pos
+                r['min'] = 1e-9
+                team_r.append(r)
+
+            res = pd.DataFrame(team_r).groupby('pos').sum()
+            rows.append(np.array(res.divide(res['min'], 'rows')[rating_cols]))
+        X.append((rows[0] - rows[1]).flatten())
+
+    return np.array(X), np.array(y)
+
+
+def test_matches_old_groupby(tmp_path):
+    data = make_export('football', num_seasons=2, num_teams=4, players_per_team=8, games_per_season=6, seed=2)
+    # A position nobody in the box scores plays, which only the dummy rows cover
+    data['players'][0]['ratings'][0]['pos'] = 'KR'
+    path = tmp_path / 'league.json'
+    with open(path, 'w', encoding='utf-8-sig') as f:
+        json.dump(data, f)
+
+    tables = load_tables(str(path))
+    positions = sorted(set(tables['player_ratings']['pos'].tolist()))
+    rating_cols = ['hgt', 'stre', 'spd', 'endu', 'thv', 'ovr']
+
+    X, y = get_position_features(tables, rating_cols, positions)
+    expected_X, expected_y = _old_features(data, rating_cols, positions)
+
+    assert 'KR' in positions
+    assert len(y) == 12 and np.any(X != 0)
+    np.testing.assert_array_equal(y, expected_y)
+    np.testing.assert_allclose(X, expected_X, rtol=1e-9, atol=1e-9)
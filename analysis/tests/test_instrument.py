@@ -0,0 +1,64 @@
+import tracemalloc
+
+import pytest
+
+from analysis import instrument
+
+
+@pytest.fixture
+def records(monkeypatch):
+    monkeypatch.setattr(instrument, '_enabled', True)
+    monkeypatch.setattr(instrument, '_records', [])
+    monkeypatch.setattr(instrument, '_stack', [])
+    tracemalloc.start()
+    yield instrument._records
+    tracemalloc.stop()
+
+
+def _by_stage(records):
+    return {r['stage']: r for r in records}
+
+
+# Without tracemalloc.reset_peak every traced peak is since tracing started, so a child's can't be smaller
+needs_reset_peak = pytest.mark.skipif(not hasattr(tracemalloc, 'reset_peak'), reason='tracemalloc.reset_peak is Python 3.9+')
+
+
+@needs_reset_peak
+def test_parent_keeps_peak_from_before_child(records):
+    with instrument.stage('outer'):
+        # 50 MB allocated and freed before the child starts, which resets the peaks
+        block = bytearray(50 * 1024 * 1024)
+        del block
+        with instrument.stage('inner'):
+            small = bytearray(1024)
+            del small
+
+    stages = _by_stage(records)
+    assert stages['outer/inner']['peak_traced_mb'] < 10
+    assert stages['outer']['peak_traced_mb'] >= 50
+    assert stages['outer']['peak_rss_mb'] >= stages['outer/inner']['peak_rss_mb']
+
+
+@needs_reset_peak
+def test_parent_includes_child_peak(records):
+    with instrument.stage('outer'):
+        with instrument.stage('first'):
+            block = bytearray(30 * 1024 * 1024)
+            del block
+        with instrument.stage('second'):
+            pass
+
+    stages = _by_stage(records)
+    assert stages['outer/first']['peak_traced_mb'] >= 30
+    assert stages['outer/second']['peak_traced_mb'] < 10
+    assert stages['outer']['peak_traced_mb'] >= 30
+
+
+def test_summary_adds_up_calls(records):
+    for _ in range(3):
+        with instrument.stage('repeated'):
+            pass
+
+    summary = instrument.get_summary()
+    assert [(r['stage'], r['calls']) for r in summary] == [('repeated', 3)]
+    assert instrument.get_summary(records[:1])[0]['calls'] == 1
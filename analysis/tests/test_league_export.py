@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from analysis import league_export
+from analysis.league_export import iter_export, iter_records
+from analysis.synthetic import make_export
+
+
+def _expected(data, keys=None):
+    """(key, record) pairs like iter_export should give, from the json.load-ed export."""
+    pairs = []
+    for key, value in data.items():
+        if keys is None or key in keys:
+            pairs.extend((key, record) for record in (value if isinstance(value, list) else [value]))
+    return pairs
+
+
+@pytest.fixture
+def export_path(tmp_path):
+    data = make_export('football', num_seasons=2, num_teams=4, players_per_team=5, games_per_season=3, seed=1)
+    # Things that are easy to get wrong at a chunk boundary: long numbers, floats with exponents, escapes, strings
+    # full of delimiters, unicode, empty arrays and top level values that aren't arrays
+    data['meta'] = {'name': 'He said "hi" {not: [json]}, \\ok\\', 'emoji': 'é中\U0001F3C0'}
+    data['numbers'] = [123456789012345678, -0.000123, 1.5e-300, 6.02e23, 0, -7, True, False, None]
+    data['empty'] = []
+    data['version'] = 51
+
+    path = tmp_path / 'export.json'
+    with open(path, 'w', encoding='utf-8-sig') as f:
+        json.dump(data, f, indent=1)
+    return path
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64, 1 << 20])
+def test_iter_export_matches_json_load(export_path, monkeypatch, chunk_size):
+    monkeypatch.setattr(league_export, 'CHUNK_SIZE', chunk_size)
+    with open(export_path, encoding='utf-8-sig') as f:
+        data = json.load(f)
+
+    assert list(iter_export(export_path)) == _expected(data)
+    assert list(iter_export(export_path, ['players', 'version'])) == _expected(data, ['players', 'version'])
+    assert list(iter_records(export_path, 'teams')) == data['teams']
+
+
+def test_iter_export_empty(tmp_path):
+    path = tmp_path / 'empty.json'
+    path.write_text(' { } ')
+    assert list(iter_export(path)) == []
@@ -0,0 +1,89 @@
+import os
+
+import pytest
+
+from analysis.pipeline import Pipeline
+
+
+def _run(cache_dir, calls, threshold=1):
+    """A small pipeline like a process.py script, recording which stages actually ran."""
+    pipeline = Pipeline('test', cache_dir=cache_dir)
+    results = {}
+
+    @pipeline.stage(inputs=['input.txt'])
+    def load():
+        calls.append('load')
+        with open('input.txt') as f:
+            return f.read().split()
+
+    @pipeline.stage(deps=['load'])
+    def features(load):
+        calls.append('features')
+        path = pipeline.output_path('txt')
+        with open(path, 'w') as f:
+            f.write(' '.join(load))
+        return {'lengths': [len(word) for word in load], 'path': path}
+
+    @pipeline.stage(deps=['features'], params={'threshold': threshold})
+    def select(features, threshold):
+        calls.append('select')
+        return [length for length in features['lengths'] if length > threshold]
+
+    @pipeline.stage(deps=['select'], cache=False)
+    def report(select):
+        calls.append('report')
+        results['selected'] = select
+
+    pipeline.run()
+    return results['selected']
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'input.txt').write_text('a bb ccc dddd')
+    return tmp_path
+
+
+def test_cached_stages_skip(workdir):
+    calls = []
+    assert _run('cache', calls) == [2, 3, 4]
+    assert calls == ['load', 'features', 'select', 'report']
+
+    calls = []
+    assert _run('cache', calls) == [2, 3, 4]
+    assert calls == ['report']
+
+
+def test_param_change_reruns_downstream_only(workdir):
+    _run('cache', [])
+
+    calls = []
+    assert _run('cache', calls, threshold=2) == [3, 4]
+    assert calls == ['select', 'report']
+
+    # Only the latest output of each stage is kept, so going back to the old value reruns select, but still nothing
+    # upstream of it
+    calls = []
+    assert _run('cache', calls, threshold=1) == [2, 3, 4]
+    assert calls == ['select', 'report']
+
+
+def test_input_change_reruns_everything_after_it(workdir):
+    _run('cache', [])
+
+    (workdir / 'input.txt').write_text('a bb ccc dddd eeeee')
+    calls = []
+    assert _run('cache', calls) == [2, 3, 4, 5]
+    assert calls == ['load', 'features', 'select', 'report']
+
+
+def test_superseded_outputs_are_removed(workdir):
+    _run('cache', [])
+    (workdir / 'input.txt').write_text('a bb')
+    _run('cache', [])
+
+    features_files = sorted(name for name in os.listdir(workdir / 'cache') if name.startswith('test-features-'))
+    # Just the current key's pickle and output file
+    assert len(features_files) == 2
+    assert len({name.split('.')[0] for name in features_files}) == 1
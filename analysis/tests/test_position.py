@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from analysis.position import PositionPredictor
+
+# Same as pos-basketball
+POS_IDX = {'PG': 0, 'SG': 1, 'SF': 2, 'PF': 3, 'C': 4, 'G': 0.5, 'F': 2.5, 'FC': 3.5, 'GF': 1.5}
+
+
+def _nearest(value, pos_idx):
+    """What pos-basketball used to do for each player: the min of (distance, label) tuples."""
+    return min((abs(value - v), k) for k, v in pos_idx.items())[1]
+
+
+@pytest.mark.parametrize('pos_idx', [
+    POS_IDX,
+    # The commented out alternative in pos-basketball, where the labels aren't in name order by position number
+    {'PG': 1, 'SG': 0, 'SF': 2, 'PF': 3, 'C': 4, 'G': 0.5, 'F': 2.5, 'FC': 3.5, 'GF': 1.5},
+    # Two labels at the same position number
+    {'PG': 0, 'G': 0, 'SG': 1, 'C': 2},
+])
+def test_nearest_labels_matches_min(pos_idx):
+    predictor = PositionPredictor(0, [], [], pos_idx)
+    # Random values, every label exactly, and every midpoint between two labels, which are ties
+    positions = sorted(set(pos_idx.values()))
+    midpoints = [(a + b) / 2 for a, b in zip(positions[:-1], positions[1:])]
+    values = np.concatenate([np.random.RandomState(0).uniform(-2, 6, 500), positions, midpoints, [-100, 100]])
+
+    assert predictor.nearest_labels(values).tolist() == [_nearest(v, pos_idx) for v in values]
+
+
+def test_predict(tmp_path):
+    predictor = PositionPredictor(1.5, [0.1, -0.05], ['hgt', 'spd'], POS_IDX)
+    ratings = {'hgt': np.array([10, 40, 60]), 'spd': np.array([80, 40, 20])}
+
+    values = predictor.predict_values(ratings)
+    np.testing.assert_allclose(values, 1.5 + 0.1 * ratings['hgt'] - 0.05 * ratings['spd'])
+    assert predictor.predict(ratings).tolist() == [_nearest(v, POS_IDX) for v in values]
+
+    path = str(tmp_path / 'model.json')
+    predictor.save(path)
+    assert PositionPredictor.load(path).predict(ratings).tolist() == predictor.predict(ratings).tolist()
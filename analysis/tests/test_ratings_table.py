@@ -0,0 +1,111 @@
+import json
+
+import numpy as np
+import pytest
+
+from analysis.ratings_table import RatingsTable, top_n
+from analysis.synthetic import make_export
+
+
+def _write(path, data):
+    with open(path, 'w', encoding='utf-8-sig') as f:
+        json.dump(data, f)
+    return str(path)
+
+
+@pytest.fixture
+def exports(tmp_path):
+    first = make_export('football', num_seasons=3, num_teams=4, players_per_team=6, seed=0)
+    # A second ratings row for the same season, which has to win like it would in a dict keyed on (pid, season)
+    player = first['players'][0]
+    player['ratings'].append(dict(player['ratings'][-1], ovr=99, spd=1))
+    # Different positions in each file, so from_files has to remap the codes
+    second = make_export('football', num_seasons=2, num_teams=3, players_per_team=5, seed=1)
+    for p in second['players']:
+        for r in p['ratings']:
+            r['pos'] = 'KR' if r['pos'] == 'QB' else r['pos']
+
+    return [first, second], [_write(tmp_path / 'a.json', first), _write(tmp_path / 'b.json', second)]
+
+
+def _expected(data):
+    """{(pid, season): (pos, ratings)} the way the scripts used to build it, straight from the export."""
+    expected = {}
+    for p in data['players']:
+        for r in p['ratings']:
+            expected[(p['pid'], r['season'])] = (r['pos'], {k: v for k, v in r.items() if type(v) == int and k != 'season'})
+    return expected
+
+
+def test_from_files_matches_dicts(exports):
+    datas, files = exports
+    ratings = RatingsTable.from_files(files)
+
+    assert ratings.positions == sorted(set(pos for data in datas for pos, _ in _expected(data).values()))
+    assert len(ratings) == sum(len(_expected(data)) for data in datas)
+
+    pos = ratings.get_pos()
+    for i, data in enumerate(datas):
+        expected = _expected(data)
+        keys = list(expected)
+        rows = ratings.find([k[0] for k in keys], [k[1] for k in keys], np.full(len(keys), i))
+        assert np.all(rows >= 0)
+        for key, row in zip(keys, rows):
+            assert ratings.file[row] == i
+            assert pos[row] == expected[key][0]
+            assert ratings.get_dict(row) == expected[key][1]
+
+
+def test_find_missing(exports):
+    _, files = exports
+    ratings = RatingsTable.from_files(files)
+
+    assert ratings.find([10 ** 6], [2000]).tolist() == [-1]
+    assert ratings.find([0], [2000], [5]).tolist() == [-1]
+
+
+def test_column(exports):
+    datas, files = exports
+    ratings = RatingsTable.from_files(files[:1])
+
+    expected = _expected(datas[0])
+    rows = ratings.find([k[0] for k in expected], [k[1] for k in expected])
+    np.testing.assert_array_equal(ratings.column('ovr')[rows], [r['ovr'] for _, r in expected.values()])
+    assert ratings.ratings.dtype == np.int16
+
+
+def test_score_matches_loop(exports):
+    datas, files = exports
+    ratings = RatingsTable.from_files(files)
+    # Some positions and ratings left out, which count as 0
+    weights = {'QB': {'thv': 0.5, 'thp': 0.25, 'ovr': -0.1}, 'KR': {'spd': 1.5}, 'OL': {'stre': 0.75, 'rbk': 0.25}}
+
+    scores = ratings.score(weights)
+
+    for i, data in enumerate(datas):
+        expected = _expected(data)
+        rows = ratings.find([k[0] for k in expected], [k[1] for k in expected], np.full(len(expected), i))
+        # What the script used to do for each player season
+        loop = [sum(weights[pos][k] * v for k, v in r.items() if k in weights.get(pos, {})) if pos in weights else 0 for pos, r in expected.values()]
+        np.testing.assert_allclose(scores[rows], loop)
+
+
+@pytest.mark.parametrize('largest', [True, False])
+@pytest.mark.parametrize('n', [1, 3, 10, 40, 60])
+def test_top_n_matches_sorted(largest, n):
+    rng = np.random.RandomState(n)
+    # Lots of ties, including right at the cutoff
+    scores = rng.randint(0, 8, 100).astype(np.float64)
+    rows = np.flatnonzero(rng.rand(100) < 0.5)
+
+    expected = sorted([(scores[k], k) for k in rows], reverse=largest)[:n]
+    assert top_n(scores, rows, n, largest).tolist() == [k for _, k in expected]
+
+
+def test_top_n_all_tied():
+    scores = np.zeros(10)
+    rows = np.array([1, 4, 5, 8])
+
+    assert top_n(scores, rows, 2, largest=True).tolist() == [8, 5]
+    assert top_n(scores, rows, 2, largest=False).tolist() == [1, 4]
+    assert top_n(scores, rows[:0], 2).tolist() == []
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.regression import fit_groups, fit_linear
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_fit_groups_matches_fit_linear():
+    rng = np.random.RandomState(0)
+    dataset = pd.DataFrame({'age': rng.randint(19, 29, 400).astype(np.float64), 'ovr': rng.uniform(30, 70, 400)})
+    dataset['pot'] = 40 + 0.8 * dataset['ovr'] - 1.5 * dataset['age'] + rng.randn(400) * 3
+    # Rows with a negative group are skipped, and the last label gets no rows at all
+    group = rng.randint(-1, 3, 400)
+    labels = ['C', 'F', 'G', 'none']
+
+    table = fit_groups(dataset[['age', 'ovr']], dataset['pot'], group, labels, ['age', 'ovr'])
+
+    assert list(table.index) == labels
+    assert list(table.columns) == ['Intercept', 'age', 'ovr', 'r2', 'n']
+    for i, label in enumerate(labels[:3]):
+        reg = fit_linear(dataset[group == i], ['age', 'ovr'], 'pot')
+        assert table.loc[label, 'Intercept'] == pytest.approx(reg.intercept_, rel=1e-8)
+        np.testing.assert_allclose(table.loc[label, ['age', 'ovr']].astype(float), reg.coef_, rtol=1e-8)
+        assert table.loc[label, 'n'] == np.sum(group == i)
+    assert table.loc['none', 'n'] == 0 and np.isnan(table.loc['none', 'Intercept'])
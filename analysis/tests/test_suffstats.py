@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+import statsmodels.api as sm
+from sklearn.linear_model import LinearRegression
+
+from analysis.suffstats import SufficientStats, solve_groups
+
+
+def _make_data(num_rows=500, num_cols=5, seed=0):
+    rng = np.random.RandomState(seed)
+    X = rng.randn(num_rows, num_cols) * rng.uniform(1, 20, num_cols) + rng.uniform(-50, 50, num_cols)
+    y = X @ rng.randn(num_cols) + 3 + rng.randn(num_rows) * 4
+    weights = rng.uniform(0.1, 3, num_rows)
+    return X, y, weights
+
+
+def _check_fit(fit, expected):
+    np.testing.assert_allclose(fit.params, expected.params, rtol=1e-8)
+    np.testing.assert_allclose(fit.bse, expected.bse, rtol=1e-8)
+    np.testing.assert_allclose(fit.tvalues, expected.tvalues, rtol=1e-8)
+    np.testing.assert_allclose(fit.pvalues, expected.pvalues, rtol=1e-6, atol=1e-300)
+    assert fit.r2 == pytest.approx(expected.rsquared, rel=1e-10)
+    assert fit.df_resid == expected.df_resid
+
+
+def test_fit_matches_ols():
+    X, y, _ = _make_data()
+    _check_fit(SufficientStats.from_data(X, y).fit(), sm.OLS(y, sm.add_constant(X)).fit())
+
+
+def test_fit_matches_wls():
+    X, y, weights = _make_data()
+    _check_fit(SufficientStats.from_data(X, y, weights).fit(), sm.WLS(y, sm.add_constant(X), weights=weights).fit())
+
+
+def test_chunks_add_up():
+    X, y, weights = _make_data()
+    # Uneven chunks, including one that's smaller than the rest
+    stats = SufficientStats.from_data(X, y, weights, chunk_size=120)
+    chunked = SufficientStats.from_chunks([(X[:300], y[:300], weights[:300]), (X[300:], y[300:], weights[300:])])
+    whole = SufficientStats.from_data(X, y, weights, chunk_size=len(y))
+
+    for other in [chunked, whole]:
+        np.testing.assert_allclose(stats.xtx, other.xtx, rtol=1e-12)
+        np.testing.assert_allclose(stats.xty, other.xty, rtol=1e-12)
+        assert stats.yty == pytest.approx(other.yty, rel=1e-12)
+        assert stats.n == other.n
+
+
+@pytest.mark.filterwarnings('ignore:The design matrix is rank-deficient')
+def test_constant_column_gets_zero():
+    X, y, _ = _make_data()
+    # Like a depth slot nobody fills, which statsmodels handles with the minimum norm solution through pinv
+    X[:, 2] = 0
+
+    fit = SufficientStats.from_data(X, y).fit()
+    intercept, coef = SufficientStats.from_data(X, y).solve()
+
+    np.testing.assert_allclose(fit.params, sm.OLS(y, sm.add_constant(X)).fit().params, rtol=1e-8, atol=1e-10)
+    assert abs(coef[2]) < 1e-12
+    np.testing.assert_allclose(np.concatenate([[intercept], coef]), fit.params, rtol=1e-8, atol=1e-10)
+
+
+def test_names_and_predict():
+    X, y, _ = _make_data()
+    fit = SufficientStats.from_data(X, y).fit(names=list('abcde'))
+
+    assert fit.names == ['const', 'a', 'b', 'c', 'd', 'e']
+    np.testing.assert_allclose(fit.predict(X), sm.OLS(y, sm.add_constant(X)).fit().fittedvalues, rtol=1e-8)
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+def test_solve_groups_matches_separate_fits():
+    X, y, _ = _make_data(num_rows=600)
+    group = np.random.RandomState(1).randint(0, 3, len(y))
+    # Group 3 has no rows, and group 2 has a column that's constant within it
+    X[group == 2, 1] = 7
+
+    intercepts, coefs, r2 = solve_groups(X, y, group, 4)
+
+    for g in range(3):
+        reg = LinearRegression().fit(X[group == g], y[group == g])
+        assert intercepts[g] == pytest.approx(reg.intercept_, rel=1e-8)
+        np.testing.assert_allclose(coefs[g], reg.coef_, rtol=1e-7, atol=1e-10)
+        assert r2[g] == pytest.approx(reg.score(X[group == g], y[group == g]), rel=1e-8)
+    assert np.isnan(intercepts[3]) and np.all(np.isnan(coefs[3])) and np.isnan(r2[3])
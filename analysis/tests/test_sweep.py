@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from analysis.sweep import get_settings, sweep
+
+
+def _make_columns(num_rows=800, seed=0):
+    rng = np.random.RandomState(seed)
+    columns = pd.DataFrame({'hgt': rng.uniform(30, 70, num_rows), 'spd': rng.uniform(30, 70, num_rows), 'MP': rng.uniform(0, 40, num_rows), 'G': rng.randint(1, 83, num_rows)})
+    columns['pm'] = 0.2 * columns['hgt'] + 0.1 * columns['spd'] - 12 + rng.randn(num_rows) * 4
+    return columns
+
+
+def test_get_settings():
+    assert get_settings({'a': [1, 2], 'b': ['x']}) == [{'a': 1, 'b': 'x'}, {'a': 2, 'b': 'x'}]
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+@pytest.mark.parametrize('processes', [1, 2])
+def test_matches_separate_fits(processes):
+    columns = _make_columns()
+    group = np.random.RandomState(1).randint(-1, 2, len(columns))
+    labels = ['C', 'F']
+    # The biggest cutoff leaves no rows at all
+    grid = {'min_minutes': [0, 820, 1500, 10 ** 6]}
+
+    table = sweep(columns, ['hgt', 'spd'], 'pm', 'MP * G > min_minutes', grid, group=group, labels=labels, processes=processes)
+
+    assert list(table.columns) == ['min_minutes', 'group', 'Intercept', 'hgt', 'spd', 'r2', 'n']
+    assert len(table) == len(grid['min_minutes']) * len(labels)
+    for row in table.itertuples():
+        mask = (columns['MP'] * columns['G'] > row.min_minutes).to_numpy() & (group == labels.index(row.group))
+        assert row.n == mask.sum()
+        if row.n == 0:
+            assert np.isnan(row.Intercept)
+            continue
+        reg = LinearRegression().fit(columns.loc[mask, ['hgt', 'spd']], columns.loc[mask, 'pm'])
+        assert row.Intercept == pytest.approx(reg.intercept_, rel=1e-8)
+        np.testing.assert_allclose([row.hgt, row.spd], reg.coef_, rtol=1e-8)
+        assert row.r2 == pytest.approx(reg.score(columns.loc[mask, ['hgt', 'spd']], columns.loc[mask, 'pm']), rel=1e-8)
+
+
+def test_no_groups():
+    columns = _make_columns()
+
+    table = sweep(columns, ['hgt'], 'pm', 'hgt > cutoff', {'cutoff': [40, 50]}, processes=1)
+
+    assert list(table.columns) == ['cutoff', 'Intercept', 'hgt', 'r2', 'n']
+    assert table['n'].tolist() == [(columns['hgt'] > 40).sum(), (columns['hgt'] > 50).sum()]